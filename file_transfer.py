@@ -7,10 +7,13 @@ Nutzt xmodem Library für XModem (pip install xmodem)
 
 import time
 import struct
+import binascii
 import os
 import socket
 from enum import Enum
 
+from fileio import open_preallocated
+
 # Versuche xmodem Library zu laden
 try:
     from xmodem import XMODEM, XMODEM1k
@@ -849,29 +852,26 @@ class FileTransfer:
     
     def _send_block(self, block_num, block_data, header, use_crc):
         """Sendet einen XModem Block"""
-        # Erstelle Block-Payload
-        block_payload = bytearray()
-        block_payload.append(header)
-        block_payload.append(block_num)
-        block_payload.append(255 - block_num)
-        block_payload.extend(block_data)
-        
-        # Berechne und füge Checksum/CRC hinzu
+        # Berechne Checksum/CRC
         if use_crc:
             crc = self._calc_crc(block_data)
-            block_payload.append((crc >> 8) & 0xFF)
-            block_payload.append(crc & 0xFF)
+            trailer = crc.to_bytes(2, 'big')
             checksum_type = f"CRC=0x{crc:04X}"
         else:
             checksum = sum(block_data) % 256
-            block_payload.append(checksum)
+            trailer = bytes((checksum,))
             checksum_type = f"Checksum=0x{checksum:02X}"
         
+        # Header + Daten + CRC in einem Stück zusammensetzen, damit der
+        # Block mit einem einzigen send() (ein TCP-Segment) rausgeht
+        block_payload = b''.join((bytes((header, block_num, 255 - block_num)),
+                                  block_data, trailer))
+        
         self.log(f"  Header: 0x{header:02X}, Block#: {block_num}, ~Block#: {255-block_num}")
         self.log(f"  Data: {len(block_data)} bytes, {checksum_type}")
         
         # Sende kompletten Block ALS ROHE BYTES (nicht PETSCII!)
-        self.connection.send_raw(bytes(block_payload))
+        self.connection.send_raw(block_payload)
         
         self.log_bytes(">>>", block_payload, f"Block {block_num}")
         
@@ -1081,16 +1081,8 @@ class FileTransfer:
         return False
     
     def _calc_crc(self, data):
-        """Berechnet CRC-16 für XModem"""
-        crc = 0
-        for byte in data:
-            crc ^= (byte << 8)
-            for _ in range(8):
-                if crc & 0x8000:
-                    crc = ((crc << 1) ^ 0x1021) & 0xFFFF
-                else:
-                    crc = (crc << 1) & 0xFFFF
-        return crc
+        """Berechnet CRC-16 für XModem (CCITT, Init 0 - crc_hqx in C)"""
+        return binascii.crc_hqx(data, 0)
     
     # Placeholder für andere Protokolle
     def _ymodem_send(self, filepath, callback):
@@ -1319,57 +1311,72 @@ class FileTransfer:
             callback: Progress callback
         """
         import os
+        import mmap
         
-        filesize = os.path.getsize(filepath)
         block_num = 1
         bytes_sent = 0
         
         with open(filepath, 'rb') as f:
-            while True:
-                # Lies 1024 Bytes
-                block_data = f.read(1024)
-                
-                if not block_data:
-                    break  # Dateiende
-                
-                # Padding wenn < 1024 Bytes
-                if len(block_data) < 1024:
-                    block_data = block_data.ljust(1024, b'\x1A')  # SUB padding
-                
-                # Sende Block mit Retry bei NAK
-                max_retries = 10
-                retry_count = 0
-                success = False
-                
-                while retry_count <= max_retries:
-                    if self._send_block(block_num, block_data, STX, use_crc=True):
-                        success = True
-                        break  # ACK empfangen ✓
+            # Größe vom offenen Handle statt erneutem stat() auf den Pfad
+            filesize = os.fstat(f.fileno()).st_size
+            # mmap statt read(): Blöcke kommen direkt aus dem Page Cache,
+            # MADV_SEQUENTIAL aktiviert Kernel-Readahead.
+            # Leere Datei: mmap() mit Länge 0 geht nicht
+            mm = None
+            if filesize:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+            read = mm.read if mm is not None else f.read
+            try:
+                while True:
+                    # Lies 1024 Bytes (aus dem mmap)
+                    block_data = read(1024)
                     
-                    # NAK empfangen - Retry
-                    retry_count += 1
-                    if retry_count <= max_retries:
-                        self.log(f"  Retry {retry_count}/{max_retries}...")
-                        import time
-                        time.sleep(0.5)  # Pause vor Retry
-                    else:
-                        self.log(f"  ✗ Block {block_num} failed after {max_retries} retries")
-                
-                if not success:
-                    return False
-                
-                # Zähle nur echte File-Bytes (ohne Padding)
-                actual_bytes = min(len(block_data), filesize - bytes_sent)
-                bytes_sent += actual_bytes
-                block_num = (block_num + 1) % 256
-                
-                if callback:
-                    # Zeige File X/Y, filename und Bytes
-                    if total_files > 1:
-                        status = f"File {file_idx}/{total_files}: {filename} ({bytes_sent}/{filesize} bytes)"
-                    else:
-                        status = f"{filename} ({bytes_sent}/{filesize} bytes)"
-                    callback(bytes_sent, filesize, status)
+                    if not block_data:
+                        break  # Dateiende
+                    
+                    # Padding wenn < 1024 Bytes
+                    if len(block_data) < 1024:
+                        block_data = block_data.ljust(1024, b'\x1A')  # SUB padding
+                    
+                    # Sende Block mit Retry bei NAK
+                    max_retries = 10
+                    retry_count = 0
+                    success = False
+                    
+                    while retry_count <= max_retries:
+                        if self._send_block(block_num, block_data, STX, use_crc=True):
+                            success = True
+                            break  # ACK empfangen ✓
+                        
+                        # NAK empfangen - Retry
+                        retry_count += 1
+                        if retry_count <= max_retries:
+                            self.log(f"  Retry {retry_count}/{max_retries}...")
+                            import time
+                            time.sleep(0.5)  # Pause vor Retry
+                        else:
+                            self.log(f"  ✗ Block {block_num} failed after {max_retries} retries")
+                    
+                    if not success:
+                        return False
+                    
+                    # Zähle nur echte File-Bytes (ohne Padding)
+                    actual_bytes = min(len(block_data), filesize - bytes_sent)
+                    bytes_sent += actual_bytes
+                    block_num = (block_num + 1) % 256
+                    
+                    if callback:
+                        # Zeige File X/Y, filename und Bytes
+                        if total_files > 1:
+                            status = f"File {file_idx}/{total_files}: {filename} ({bytes_sent}/{filesize} bytes)"
+                        else:
+                            status = f"{filename} ({bytes_sent}/{filesize} bytes)"
+                        callback(bytes_sent, filesize, status)
+            finally:
+                if mm is not None:
+                    mm.close()
         
         # EOT senden
         self.log("Sende EOT...")
@@ -1618,7 +1625,9 @@ class FileTransfer:
         block_num = 1
         bytes_received = 0
         
-        with open(filepath, 'wb') as f:
+        # Größe aus Block 0 bekannt: vorab reservieren statt pro 1K-Block
+        # zu verlängern (bei Abbruch wird auf das Geschriebene gekürzt)
+        with open_preallocated(filepath, filesize) as f:
             while bytes_received < filesize:
                 # Empfange Block (STX für 1024-byte blocks)
                 self.log(f"Waiting for Block {block_num}...")
@@ -1732,7 +1741,8 @@ class FileTransfer:
         # Bei filesize=0: Unbekannte Größe (XModem Fallback)
         unknown_size = (filesize == 0)
         
-        with open(filepath, 'wb') as f:
+        # w+b: Datei bleibt bis nach dem Padding-Strip offen
+        with open(filepath, 'w+b') as f:
             while True:
                 # Empfange Block
                 block_data = self._receive_block(block_num, 1024, use_crc=True)
@@ -1772,20 +1782,20 @@ class FileTransfer:
                 # Datei komplett? (nur bei bekannter Größe)
                 if not unknown_size and bytes_received >= filesize:
                     break
-        
-        # Bei unbekannter Größe: Entferne SUB-Padding (0x1A) am Ende
-        if unknown_size:
-            import os
-            # Lese Datei
-            with open(filepath, 'rb') as f:
-                data = f.read()
-            # Entferne trailing 0x1A
-            while data and data[-1] == 0x1A:
-                data = data[:-1]
-            # Schreibe zurück
-            with open(filepath, 'wb') as f:
-                f.write(data)
-            self.log(f"Padding entfernt - finale Größe: {len(data)} bytes")
+            
+            # Bei unbekannter Größe: Entferne SUB-Padding (0x1A) am Ende
+            # Rückwärts blockweise lesen und im selben Handle truncaten
+            if unknown_size:
+                end = f.tell()
+                while end:
+                    start = max(0, end - 1024)
+                    f.seek(start)
+                    stripped = f.read(end - start).rstrip(b'\x1a')
+                    end = start + len(stripped)
+                    if stripped:
+                        break
+                f.truncate(end)
+                self.log(f"Padding entfernt - finale Größe: {end} bytes")
         
         # Warte auf EOT
         self.log("Warte auf EOT...")
@@ -3861,6 +3871,43 @@ class FileTransfer:
     RAWTCP_INIT = 0x11   # Client → Server: Bereit für Transfer
     RAWTCP_BATCH = 0x12  # Batch-Modus: mehrere Dateien
     
+    def _rawtcp_sendfile_socket(self):
+        """
+        Socket für Zero-Copy os.sendfile() - oder None
+        
+        Nur wenn os.sendfile existiert, die Verbindung ein echter Socket ist
+        und kein Raw-Traffic-Log läuft (sendfile umgeht connection.send_raw()).
+        """
+        if not hasattr(os, 'sendfile'):
+            return None
+        sock = getattr(self.connection, 'socket', None)
+        if not isinstance(sock, socket.socket):
+            return None
+        if not getattr(self.connection, 'connected', True):
+            return None
+        if getattr(self.connection, '_traffic_logging', False):
+            return None
+        return sock
+    
+    def _sendfile_chunk(self, sock, f, offset, count, timeout=10.0):
+        """
+        Sendet bis zu count Bytes ab offset per os.sendfile()
+        
+        Socket mit Timeout ist intern non-blocking, daher bei vollem
+        Sendepuffer per select() warten.
+        
+        Returns:
+            Anzahl gesendeter Bytes (0 = Dateiende)
+        """
+        import select
+        while True:
+            try:
+                return os.sendfile(sock.fileno(), f.fileno(), offset, count)
+            except BlockingIOError:
+                _, writable, _ = select.select([], [sock], [], timeout)
+                if not writable:
+                    raise socket.timeout("sendfile timed out")
+    
     def _rawtcp_send(self, filepath, callback):
         """
         RAWTCP Send - Maximaler Speed, minimaler Overhead
@@ -3979,15 +4026,23 @@ class FileTransfer:
                 bytes_sent_file = 0
                 chunk_size = 65536
                 
+                # Zero-Copy per sendfile() wenn direkt auf den Socket möglich
+                sock = self._rawtcp_sendfile_socket()
+                
                 with open(fp, 'rb') as f:
                     while True:
-                        data = f.read(chunk_size)
-                        if not data:
+                        if sock is not None:
+                            sent = self._sendfile_chunk(sock, f, bytes_sent_file, chunk_size)
+                        else:
+                            data = f.read(chunk_size)
+                            sent = len(data)
+                            if sent:
+                                self.send_raw(data)
+                        if not sent:
                             break
                         
-                        self.send_raw(data)
-                        bytes_sent_file += len(data)
-                        total_bytes_sent += len(data)
+                        bytes_sent_file += sent
+                        total_bytes_sent += sent
                         
                         if callback:
                             callback(total_bytes_sent, total_size, f"📤 {filename}")
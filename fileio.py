@@ -0,0 +1,30 @@
+"""
+Datei-Hilfsfunktionen für die Transfer-Protokolle
+Gemeinsam genutzt von file_transfer.py (X/YModem) und turbomodem.py
+"""
+
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def open_preallocated(path, size, buffering=-1):
+    """open(path, 'wb') mit vorab reservierten size Bytes (posix_fallocate).
+    
+    Writes überschreiben dann nur noch statt die Datei pro Block/Window zu
+    verlängern. Beim Verlassen (auch bei Abbruch/Exception) wird auf die
+    geschriebene Länge gekürzt - es bleiben keine reservierten Null-Bytes.
+    Ohne posix_fallocate (Windows, macOS) normales open().
+    """
+    with open(path, 'wb', buffering=buffering) as f:
+        if size > 0 and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError:
+                pass  # z.B. Dateisystem ohne fallocate
+        try:
+            yield f
+        finally:
+            pos = f.tell()
+            if pos < size:
+                f.truncate(pos)
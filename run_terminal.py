@@ -29,6 +29,7 @@ required_files = [
     'c64_keyboard.py',
     'telnet_client.py',
     'file_transfer.py',
+    'fileio.py',
     'terminal_extensions.py',
     'upper.bmp',
     'lower.bmp'
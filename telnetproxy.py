@@ -1,4 +1,5 @@
 import asyncio
+import binascii
 import datetime
 import threading
 import msvcrt   # nur Windows-Konsole
@@ -31,15 +32,7 @@ def crc16_xmodem(data: bytes) -> int:
     CRC16-CCITT (XMODEM) – Polynom 0x1021, Initialwert 0x0000.
     Wird bei YMODEM im CRC-Mode verwendet.
     """
-    crc = 0x0000
-    for b in data:
-        crc ^= b << 8
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = ((crc << 1) & 0xFFFF) ^ 0x1021
-            else:
-                crc = (crc << 1) & 0xFFFF
-    return crc & 0xFFFF
+    return binascii.crc_hqx(data, 0)
 
 
 class YModemParser:
@@ -5,6 +5,7 @@ Enthält: Upload/Download Dialoge, Settings, Scrollback Buffer
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import struct
 import threading
 from file_transfer import FileTransfer, TransferProtocol
 
@@ -402,6 +403,28 @@ class ScrollbackBuffer:
         """Gibt alle RAW PETSCII bytes zurück"""
         return bytes(self.raw_bytes)
     
+    def iter_bytes(self, chunk_size=64 * 1024):
+        """Liefert die RAW PETSCII bytes stückweise (ohne Kopie des ganzen Buffers)"""
+        for offset in range(0, len(self.raw_bytes), chunk_size):
+            yield self.raw_bytes[offset:offset + chunk_size]
+    
+    def iter_text(self):
+        """Liefert den Buffer-Text stückweise, gleicher Inhalt wie get_all_text()"""
+        first = True
+        for line in self.lines:
+            if not first:
+                yield '\n'
+            first = False
+            yield line
+        if self.current_line:
+            if not first:
+                yield '\n'
+            yield ''.join(self.current_line)
+    
+    def get_byte_count(self):
+        """Gibt Anzahl der RAW bytes zurück"""
+        return len(self.raw_bytes)
+    
     def clear(self):
         """Löscht den Buffer"""
         self.lines = []
@@ -786,8 +809,6 @@ class ScrollbackViewer(tk.Toplevel):
         )
         if filename:
             try:
-                all_bytes = self.buffer.get_all_bytes()
-                
                 import json
                 metadata = {
                     "width": self.screen.width,
@@ -795,17 +816,18 @@ class ScrollbackViewer(tk.Toplevel):
                     "version": "3.3"
                 }
                 header = json.dumps(metadata).encode('utf-8')
-                header_len = len(header)
                 
+                # 2 Byte Header-Länge (big endian) + JSON Header,
+                # danach PETSCII Daten direkt aus dem Buffer streamen
                 with open(filename, 'wb') as f:
-                    f.write(header_len.to_bytes(2, byteorder='big'))
-                    f.write(header)
-                    f.write(all_bytes)
+                    f.write(struct.pack('>H', len(header)) + header)
+                    for chunk in self.buffer.iter_bytes():
+                        f.write(chunk)
                 
                 messagebox.showinfo("Success", 
                     f"RAW gespeichert: {filename}\n"
                     f"Width: {self.screen.width} columns\n"
-                    f"Size: {len(all_bytes)} bytes", 
+                    f"Size: {self.buffer.get_byte_count()} bytes", 
                     parent=self)
             except Exception as e:
                 messagebox.showerror("Error", f"Fehler: {str(e)}", parent=self)
@@ -821,7 +843,7 @@ class ScrollbackViewer(tk.Toplevel):
         if filename:
             try:
                 with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.buffer.get_all_text())
+                    f.writelines(self.buffer.iter_text())
                 messagebox.showinfo("Success", f"Text gespeichert: {filename}", parent=self)
             except Exception as e:
                 messagebox.showerror("Error", f"Fehler: {str(e)}", parent=self)
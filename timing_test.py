@@ -8,17 +8,31 @@ import sys
 
 def measure_sleep_accuracy(target_ms, iterations=100):
     """Misst die tatsächliche Dauer von time.sleep()"""
-    errors = []
+    # Lokale Namen statt Attribut-Lookup im Messloop
+    perf_counter = time.perf_counter
+    sleep = time.sleep
+    sleep_s = target_ms / 1000.0
+    
+    # Einmaliger Warm-up Sleep (erste Messung ist oft Ausreißer)
+    sleep(sleep_s)
+    
+    total_error = 0.0
+    min_error = float('inf')
+    max_error = float('-inf')
     for _ in range(iterations):
-        start = time.perf_counter()
-        time.sleep(target_ms / 1000.0)
-        actual = (time.perf_counter() - start) * 1000
-        errors.append(actual - target_ms)
+        start = perf_counter()
+        sleep(sleep_s)
+        actual = (perf_counter() - start) * 1000
+        error = actual - target_ms
+        total_error += error
+        if error < min_error:
+            min_error = error
+        if error > max_error:
+            max_error = error
     
-    avg_error = sum(errors) / len(errors)
-    max_error = max(errors)
-    min_actual = target_ms + min(errors)
-    max_actual = target_ms + max(errors)
+    avg_error = total_error / iterations
+    min_actual = target_ms + min_error
+    max_actual = target_ms + max_error
     
     return avg_error, min_actual, max_actual
 
@@ -3,20 +3,84 @@ Tools Module für PYCGMS Terminal
 Enthält Funktionen für D64/D71/D81 Disk Image Operationen
 """
 
+import functools
 import os
+import re
+import struct
+from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    from d64 import DiskImage
+    HAS_D64_LIB = True
+except ImportError:
+    HAS_D64_LIB = False
+
+
+def _advise_sequential_read(f):
+    """Kündigt dem Kernel an, dass die Datei komplett sequentiell gelesen wird."""
+    # posix_fadvise gibt es nur auf POSIX-Systemen (nicht Windows/macOS)
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = f.fileno()
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+# Normalisierung für Header-Zeile: a-z -> A-Z, Shifted Space ($A0) -> Space
+DIR_NORMALIZE_TABLE = bytes.maketrans(
+    b'\xA0' + bytes(range(0x61, 0x7B)),
+    b' ' + bytes(range(0x41, 0x5B))
+)
+
+# Dateinamen: nur Shifted Space ($A0) -> Space, Grafik-Zeichen bleiben erhalten
+DIR_NAME_TABLE = bytes.maketrans(b'\xA0', b' ')
+
+# Directory-Eintrag (32 Bytes): File Type ($02), Filename ($05-$14), Blocks ($1E-$1F)
+DIR_ENTRY = struct.Struct('<2xB2x16s9xH')
+
+# File Type Namen (untere 4 Bits des Type-Bytes)
+DIR_FILE_TYPES = (b'DEL', b'SEQ', b'PRG', b'USR', b'REL') + (b'???',) * 11
+
+# Leerer Sektor zum schnellen Vergleich (unbenutzte Blocks)
+ZERO_SECTOR = bytes(256)
+
+# Gültige PETSCII-Bytes in CMD Dateinamen:
+# Null / Shifted Space, Standard printable ($20-$5F),
+# Shifted printable ($A1-$BF), Shifted graphics ($C0-$DF)
+CMD_VALID_NAME_BYTES = bytes(
+    b for b in range(256)
+    if b in (0x00, 0xA0) or 0x20 <= b <= 0x5F or 0xA1 <= b <= 0xDF
+)
+
+
+def _d64_track_offsets(max_track=255):
+    """Kumulierte Byte-Offsets der Tracks 1..max_track im D64-Layout"""
+    offsets = []
+    offset = 0
+    for t in range(1, max_track + 1):
+        offsets.append(offset)
+        if t <= 17:
+            offset += 21 * 256
+        elif t <= 24:
+            offset += 19 * 256
+        elif t <= 30:
+            offset += 18 * 256
+        else:
+            offset += 17 * 256
+    return tuple(offsets)
+
 
 class DiskImageViewer:
     """Liest und rendert D64/D71/D81 Disk Image Directories"""
     
-    # Track Offset Tabellen für verschiedene Disk-Formate
-    D64_TRACK_OFFSETS = [
-        0,      # Track 1 starts at 0
-        0x1500, 0x2A00, 0x3F00, 0x5400, 0x6900, 0x7E00, 0x9300, 0xA800,
-        0xBD00, 0xD200, 0xE700, 0xFC00, 0x11100, 0x12600, 0x13B00, 0x15000,
-        0x16500,  # Track 18 (Directory)
-    ]
+    # Track Offset Tabelle für D64 (Index = Track - 1)
+    # Tracks 1-17: 21 Sectors, 18-24: 19, 25-30: 18, ab 31: 17
+    # Track 18 (Directory) beginnt bei 0x16500
+    D64_TRACK_OFFSETS = _d64_track_offsets()
     
     def __init__(self, filepath):
         self.filepath = Path(filepath)
@@ -40,121 +104,116 @@ class DiskImageViewer:
         else:
             raise ValueError(f"Unbekanntes Format: {ext}")
     
+    def _load_image(self):
+        """Liest das komplette Disk Image in den Speicher"""
+        with open(self.filepath, 'rb') as f:
+            return f.read()
+    
     def _read_d64(self):
         """Liest D64 Directory (Track 18)"""
-        with open(self.filepath, 'rb') as f:
-            # BAM ist Track 18, Sector 0
-            # Bei D64: Track 18 beginnt bei Offset 0x16500
-            bam_offset = 0x16500
-            
-            f.seek(bam_offset)
-            bam = f.read(256)
-            
-            # Disk Name bei Offset 0x90 (16 bytes)
-            self.disk_name = bam[0x90:0x90+16]
-            # Disk ID bei Offset 0xA2 (5 bytes: ID + 0xA0 + DOS Type)
-            self.disk_id = bam[0xA2:0xA7]
-            
-            # Blocks Free berechnen aus BAM
-            self.blocks_free = self._count_free_blocks_d64(bam)
-            
-            # Directory Entries lesen (ab Sector 1)
-            self.entries = []
-            
-            # Erste Directory-Zeile: Header mit Disk Name
-            header_line = self._format_header_line()
-            self.entries.append(header_line)
-            
-            # Directory Chain folgen
-            next_track = bam[0]  # Normalerweise 18
-            next_sector = bam[1]  # Normalerweise 1
-            
-            while next_track != 0:
-                sector_offset = self._get_sector_offset_d64(next_track, next_sector)
-                f.seek(sector_offset)
-                sector_data = f.read(256)
-                
-                # Nächster Sector in Chain
-                next_track = sector_data[0]
-                next_sector = sector_data[1]
-                
-                # 8 Directory Entries pro Sector (je 32 bytes)
-                for i in range(8):
-                    entry_offset = i * 32
-                    entry = sector_data[entry_offset:entry_offset+32]
-                    
-                    file_type = entry[2]
-                    if file_type != 0:  # Gültiger Eintrag
-                        line = self._format_dir_entry(entry)
-                        self.entries.append(line)
+        data = self._load_image()
+        
+        # BAM ist Track 18, Sector 0
+        # Bei D64: Track 18 beginnt bei Offset 0x16500
+        bam_offset = 0x16500
+        
+        bam = data[bam_offset:bam_offset + 256]
+        
+        # Disk Name bei Offset 0x90 (16 bytes)
+        self.disk_name = bam[0x90:0x90+16]
+        # Disk ID bei Offset 0xA2 (5 bytes: ID + 0xA0 + DOS Type)
+        self.disk_id = bam[0xA2:0xA7]
+        
+        # Blocks Free berechnen aus BAM
+        self.blocks_free = self._count_free_blocks_d64(bam)
+        
+        # Directory Entries lesen (ab Sector 1)
+        self.entries = []
+        
+        # Erste Directory-Zeile: Header mit Disk Name
+        header_line = self._format_header_line()
+        self.entries.append(header_line)
+        
+        # Directory Chain folgen
+        next_track = bam[0]  # Normalerweise 18
+        next_sector = bam[1]  # Normalerweise 1
+        
+        while next_track != 0:
+            sector_offset = self._get_sector_offset_d64(next_track, next_sector)
+            sector_data = data[sector_offset:sector_offset + 256]
             
-            # Blocks Free Zeile
-            free_line = self._format_blocks_free()
-            self.entries.append(free_line)
+            # Nächster Sector in Chain
+            next_track = sector_data[0]
+            next_sector = sector_data[1]
             
+            # 8 Directory Entries pro Sector (je 32 bytes)
+            for file_type, filename, blocks in DIR_ENTRY.iter_unpack(sector_data):
+                if file_type != 0:  # Gültiger Eintrag
+                    line = self._format_dir_fields(file_type, filename, blocks)
+                    self.entries.append(line)
+        
+        # Blocks Free Zeile
+        free_line = self._format_blocks_free()
+        self.entries.append(free_line)
+        
         return self.entries
     
     def _read_d71(self):
         """Liest D71 Directory (doppelseitig)"""
-        with open(self.filepath, 'rb') as f:
-            # D71: 70 Tracks (35 + 35), wie D64 aber doppelseitig
-            # BAM ist Track 18, Sector 0
-            bam_offset = 0x16500
-            
-            f.seek(bam_offset)
-            bam = f.read(256)
-            
-            # Disk Name bei Offset 0x90 (16 bytes)
-            self.disk_name = bam[0x90:0x90+16]
-            self.disk_id = bam[0xA2:0xA7]
-            
-            # Blocks Free für Side 1 (Tracks 1-35, ohne Track 18)
-            free_side1 = 0
-            for i in range(35):
-                if i == 17:  # Track 18 = Directory
-                    continue
-                free_side1 += bam[4 + i*4]
-            
-            # Blocks Free für Side 2 (Tracks 36-70)
-            # Bei D71 ist die Side 2 BAM ab Offset 0xDD (221) im gleichen Sector
-            # 35 Bytes, je 1 Byte = freie Sectors pro Track
-            free_side2 = 0
-            for i in range(35):
-                if i == 17:  # Track 53 = Directory Side 2 (optional)
-                    continue
-                free_side2 += bam[0xDD + i]
-            
-            self.blocks_free = free_side1 + free_side2
-            
-            # Directory Entries
-            self.entries = []
-            header_line = self._format_header_line()
-            self.entries.append(header_line)
-            
-            # Directory Chain folgen (wie D64)
-            next_track = bam[0]
-            next_sector = bam[1]
-            
-            while next_track != 0:
-                sector_offset = self._get_sector_offset_d71(next_track, next_sector)
-                f.seek(sector_offset)
-                sector_data = f.read(256)
-                
-                next_track = sector_data[0]
-                next_sector = sector_data[1]
-                
-                for i in range(8):
-                    entry_offset = i * 32
-                    entry = sector_data[entry_offset:entry_offset+32]
-                    
-                    file_type = entry[2]
-                    if file_type != 0:
-                        line = self._format_dir_entry(entry)
-                        self.entries.append(line)
+        data = self._load_image()
+        
+        # D71: 70 Tracks (35 + 35), wie D64 aber doppelseitig
+        # BAM ist Track 18, Sector 0
+        bam_offset = 0x16500
+        
+        bam = data[bam_offset:bam_offset + 256]
+        
+        # Disk Name bei Offset 0x90 (16 bytes)
+        self.disk_name = bam[0x90:0x90+16]
+        self.disk_id = bam[0xA2:0xA7]
+        
+        # Blocks Free für Side 1 (Tracks 1-35, ohne Track 18)
+        free_side1 = 0
+        for i in range(35):
+            if i == 17:  # Track 18 = Directory
+                continue
+            free_side1 += bam[4 + i*4]
+        
+        # Blocks Free für Side 2 (Tracks 36-70)
+        # Bei D71 ist die Side 2 BAM ab Offset 0xDD (221) im gleichen Sector
+        # 35 Bytes, je 1 Byte = freie Sectors pro Track
+        free_side2 = 0
+        for i in range(35):
+            if i == 17:  # Track 53 = Directory Side 2 (optional)
+                continue
+            free_side2 += bam[0xDD + i]
+        
+        self.blocks_free = free_side1 + free_side2
+        
+        # Directory Entries
+        self.entries = []
+        header_line = self._format_header_line()
+        self.entries.append(header_line)
+        
+        # Directory Chain folgen (wie D64)
+        next_track = bam[0]
+        next_sector = bam[1]
+        
+        while next_track != 0:
+            sector_offset = self._get_sector_offset_d71(next_track, next_sector)
+            sector_data = data[sector_offset:sector_offset + 256]
             
-            free_line = self._format_blocks_free()
-            self.entries.append(free_line)
+            next_track = sector_data[0]
+            next_sector = sector_data[1]
             
+            for file_type, filename, blocks in DIR_ENTRY.iter_unpack(sector_data):
+                if file_type != 0:
+                    line = self._format_dir_fields(file_type, filename, blocks)
+                    self.entries.append(line)
+        
+        free_line = self._format_blocks_free()
+        self.entries.append(free_line)
+        
         return self.entries
     
     def _get_sector_offset_d71(self, track, sector):
@@ -171,74 +230,67 @@ class DiskImageViewer:
     
     def _read_d81(self):
         """Liest D81 Directory (Track 40)"""
-        with open(self.filepath, 'rb') as f:
-            # D81: 80 Tracks, 40 Sectors pro Track, 256 bytes pro Sector
-            # Header auf Track 40, Sector 0
-            # BAM auf Track 40, Sectors 1 und 2
-            
-            header_offset = (40 - 1) * 40 * 256  # Track 40, Sector 0
-            
-            f.seek(header_offset)
-            header = f.read(256)
-            
-            # Disk Name bei Offset 0x04
-            self.disk_name = header[0x04:0x04+16]
-            self.disk_id = header[0x16:0x1B]
-            
-            # BAM Sector 1 (Track 40, Sector 1) - Tracks 1-40
-            f.seek(header_offset + 256)
-            bam1 = f.read(256)
-            
-            # BAM Sector 2 (Track 40, Sector 2) - Tracks 41-80
-            f.seek(header_offset + 512)
-            bam2 = f.read(256)
-            
-            # Zähle freie Blocks
-            # Format: 6 Bytes pro Track, Byte 0 = Anzahl freier Sectors
-            self.blocks_free = 0
-            
-            # BAM 1: Tracks 1-40 (ab Offset 0x10)
-            for i in range(40):
-                if i == 39:  # Track 40 = Directory
-                    continue
-                offset = 0x10 + i * 6
-                if offset < len(bam1):
-                    self.blocks_free += bam1[offset]
-            
-            # BAM 2: Tracks 41-80 (ab Offset 0x10)
-            for i in range(40):
-                offset = 0x10 + i * 6
-                if offset < len(bam2):
-                    self.blocks_free += bam2[offset]
-            
-            self.entries = []
-            header_line = self._format_header_line()
-            self.entries.append(header_line)
-            
-            # Directory ab Track 40, Sector 3
-            next_track = 40
-            next_sector = 3
-            
-            while next_track != 0:
-                sector_offset = (next_track - 1) * 40 * 256 + next_sector * 256
-                f.seek(sector_offset)
-                sector_data = f.read(256)
-                
-                next_track = sector_data[0]
-                next_sector = sector_data[1]
-                
-                for i in range(8):
-                    entry_offset = i * 32
-                    entry = sector_data[entry_offset:entry_offset+32]
-                    
-                    file_type = entry[2]
-                    if file_type != 0:
-                        line = self._format_dir_entry(entry)
-                        self.entries.append(line)
+        data = self._load_image()
+        
+        # D81: 80 Tracks, 40 Sectors pro Track, 256 bytes pro Sector
+        # Header auf Track 40, Sector 0
+        # BAM auf Track 40, Sectors 1 und 2
+        
+        header_offset = (40 - 1) * 40 * 256  # Track 40, Sector 0
+        
+        header = data[header_offset:header_offset + 256]
+        
+        # Disk Name bei Offset 0x04
+        self.disk_name = header[0x04:0x04+16]
+        self.disk_id = header[0x16:0x1B]
+        
+        # BAM Sector 1 (Track 40, Sector 1) - Tracks 1-40
+        bam1 = data[header_offset + 256:header_offset + 512]
+        
+        # BAM Sector 2 (Track 40, Sector 2) - Tracks 41-80
+        bam2 = data[header_offset + 512:header_offset + 768]
+        
+        # Zähle freie Blocks
+        # Format: 6 Bytes pro Track, Byte 0 = Anzahl freier Sectors
+        self.blocks_free = 0
+        
+        # BAM 1: Tracks 1-40 (ab Offset 0x10)
+        for i in range(40):
+            if i == 39:  # Track 40 = Directory
+                continue
+            offset = 0x10 + i * 6
+            if offset < len(bam1):
+                self.blocks_free += bam1[offset]
+        
+        # BAM 2: Tracks 41-80 (ab Offset 0x10)
+        for i in range(40):
+            offset = 0x10 + i * 6
+            if offset < len(bam2):
+                self.blocks_free += bam2[offset]
+        
+        self.entries = []
+        header_line = self._format_header_line()
+        self.entries.append(header_line)
+        
+        # Directory ab Track 40, Sector 3
+        next_track = 40
+        next_sector = 3
+        
+        while next_track != 0:
+            sector_offset = (next_track - 1) * 40 * 256 + next_sector * 256
+            sector_data = data[sector_offset:sector_offset + 256]
             
-            free_line = self._format_blocks_free()
-            self.entries.append(free_line)
+            next_track = sector_data[0]
+            next_sector = sector_data[1]
             
+            for file_type, filename, blocks in DIR_ENTRY.iter_unpack(sector_data):
+                if file_type != 0:
+                    line = self._format_dir_fields(file_type, filename, blocks)
+                    self.entries.append(line)
+        
+        free_line = self._format_blocks_free()
+        self.entries.append(free_line)
+        
         return self.entries
     
     def _read_cmd_native(self):
@@ -251,8 +303,7 @@ class DiskImageViewer:
         - Header bei Sector 1
         - Directory als linked list
         """
-        with open(self.filepath, 'rb') as f:
-            data = f.read()
+        data = self._load_image()
         
         sector_size = 256
         total_sectors = len(data) // sector_size
@@ -263,17 +314,8 @@ class DiskImageViewer:
         
         def is_valid_filename(fname):
             """Prüft ob Filename gültige PETSCII-Zeichen enthält"""
-            for b in fname:
-                if b == 0xA0 or b == 0x00:  # Shifted space / Null
-                    continue
-                if 0x20 <= b <= 0x5F:  # Standard printable
-                    continue
-                if 0xA1 <= b <= 0xBF:  # Shifted printable
-                    continue
-                if 0xC0 <= b <= 0xDF:  # Shifted graphics
-                    continue
-                return False
-            return True
+            # Alle gültigen Bytes löschen - bleibt nichts übrig, ist der Name gültig
+            return not fname.translate(None, CMD_VALID_NAME_BYTES)
         
         # Header bei Sector 1
         header = get_sector(1)
@@ -292,35 +334,71 @@ class DiskImageViewer:
         valid_types = {0x80, 0x81, 0x82, 0x83, 0x84,  # Normal
                        0xC0, 0xC1, 0xC2, 0xC3, 0xC4}  # Locked
         
-        # Scanne alle Sektoren nach Directory-Einträgen
-        # (robuster als Chain-Following bei fragmentierten Images)
         all_raw_entries = []
         seen_names = set()
         
-        for sector_num in range(total_sectors):
-            sector_data = get_sector(sector_num)
-            if not sector_data:
-                continue
-            
-            # Zähle gültige Einträge im Sektor
+        def valid_entries(sector_data):
+            """Einträge mit gültigem File Type und Filename aus einem Sektor"""
             sector_entries = []
-            for i in range(8):
-                entry = sector_data[i*32:(i+1)*32]
-                file_type = entry[2]
+            for entry in DIR_ENTRY.iter_unpack(sector_data):
+                file_type, fname, _ = entry
                 
                 if file_type in valid_types:
-                    fname = entry[5:21]
                     if is_valid_filename(fname):
                         sector_entries.append(entry)
+            return sector_entries
+        
+        def add_entries(sector_entries):
+            for entry in sector_entries:
+                # Deduplizierung basierend auf Dateiname
+                fname = entry[1]
+                if fname not in seen_names:
+                    seen_names.add(fname)
+                    all_raw_entries.append(entry)
+        
+        # Schneller Weg: Directory-Chain ab Header folgen
+        # (Native Partition: 256 Sektoren pro Track)
+        chain_ok = True
+        visited = set()
+        next_track = header[0]
+        next_sector = header[1]
+        
+        while next_track != 0:
+            sector_num = (next_track - 1) * 256 + next_sector
+            sector_data = get_sector(sector_num)
+            if sector_num in visited or not sector_data:
+                chain_ok = False  # Schleife oder Link ins Leere
+                break
+            visited.add(sector_num)
             
-            # Mindestens 3 gültige Einträge = Directory-Sektor
-            if len(sector_entries) >= 3:
-                for entry in sector_entries:
-                    # Deduplizierung basierend auf Dateiname
-                    fname = bytes(entry[5:21])
-                    if fname not in seen_names:
-                        seen_names.add(fname)
-                        all_raw_entries.append(entry)
+            next_track = sector_data[0]
+            next_sector = sector_data[1]
+            add_entries(valid_entries(sector_data))
+        
+        # Fallback: Chain defekt oder (fast) leer -> alle Sektoren scannen
+        # (robuster als Chain-Following bei fragmentierten Images)
+        if not chain_ok or len(all_raw_entries) < 2:
+            all_raw_entries.clear()
+            seen_names.clear()
+            
+            for sector_num in range(total_sectors):
+                sector_data = get_sector(sector_num)
+                if not sector_data:
+                    continue
+                
+                # Vorfilter: Link muss Chain-Ende sein oder ins Image zeigen
+                link_track = sector_data[0]
+                if link_track != 0 and (link_track - 1) * 256 + sector_data[1] >= total_sectors:
+                    continue
+                
+                # Vorfilter: mindestens 3 gültige File Types an den Entry-Offsets
+                if sum(t in valid_types for t in sector_data[2::32]) < 3:
+                    continue
+                
+                # Mindestens 3 gültige Einträge = Directory-Sektor
+                sector_entries = valid_entries(sector_data)
+                if len(sector_entries) >= 3:
+                    add_entries(sector_entries)
         
         # BAM für Blocks Free (aus Header-Sektor 0)
         self.blocks_free = self._calc_blocks_free_cmd(data)
@@ -330,8 +408,8 @@ class DiskImageViewer:
         header_line = self._format_header_line()
         self.entries.append(header_line)
         
-        for entry in all_raw_entries:
-            line = self._format_dir_entry(entry)
+        for file_type, filename, blocks in all_raw_entries:
+            line = self._format_dir_fields(file_type, filename, blocks)
             self.entries.append(line)
         
         # Blocks Free Zeile
@@ -349,11 +427,11 @@ class DiskImageViewer:
         # Vereinfachte Berechnung: Total Sektoren minus geschätzte benutzte
         # (echte BAM-Berechnung wäre komplex)
         
-        # Zähle benutzte Sektoren (nicht-null)
+        # Zähle benutzte Sektoren (nicht-null), Vergleich per memcmp
+        data_view = memoryview(data)
         used = 0
-        for i in range(total_sectors):
-            sector = data[i*sector_size:(i+1)*sector_size]
-            if any(b != 0 for b in sector):
+        for offset in range(0, total_sectors * sector_size, sector_size):
+            if data_view[offset:offset + sector_size] != ZERO_SECTOR:
                 used += 1
         
         # Grobe Schätzung: Total - Used - BAM/System Overhead
@@ -366,24 +444,7 @@ class DiskImageViewer:
     
     def _get_sector_offset_d64(self, track, sector):
         """Berechnet Byte-Offset für Track/Sector in D64"""
-        # Tracks 1-17: 21 Sectors
-        # Tracks 18-24: 19 Sectors
-        # Tracks 25-30: 18 Sectors
-        # Tracks 31-35: 17 Sectors
-        
-        offset = 0
-        for t in range(1, track):
-            if t <= 17:
-                offset += 21 * 256
-            elif t <= 24:
-                offset += 19 * 256
-            elif t <= 30:
-                offset += 18 * 256
-            else:
-                offset += 17 * 256
-        
-        offset += sector * 256
-        return offset
+        return self.D64_TRACK_OFFSETS[track - 1] + sector * 256
     
     def _count_free_blocks_d64(self, bam):
         """Zählt freie Blocks aus BAM (ohne Track 18 = Directory)"""
@@ -399,31 +460,9 @@ class DiskImageViewer:
         """Formatiert die Header-Zeile mit Disk Name"""
         # Format: 0 "DISKNAME        " ID DOS
         # " startet an Position 2 (3. Zeichen)
-        line = bytearray()
-        
-        # "0" am Anfang
-        line.append(0x30)  # '0'
-        
-        # Padding bis Position 2
-        while len(line) < 2:
-            line.append(0x20)  # Space
-        
-        # Anführungszeichen an Position 2
-        line.append(0x22)  # "
-        
-        # Disk Name (16 chars)
-        for b in self.disk_name[:16]:
-            line.append(self._normalize_petscii(b))
-        
-        # Anführungszeichen
-        line.append(0x22)  # "
-        line.append(0x20)  # Space
-        
-        # Disk ID (5 chars)
-        for b in self.disk_id[:5]:
-            line.append(self._normalize_petscii(b))
-        
-        return bytes(line)
+        disk_name = bytes(self.disk_name[:16]).translate(DIR_NORMALIZE_TABLE)
+        disk_id = bytes(self.disk_id[:5]).translate(DIR_NORMALIZE_TABLE)
+        return b'0 "' + disk_name + b'" ' + disk_id
     
     def _normalize_petscii(self, b):
         """Normalisiert ein Byte zu gültigem PETSCII für Uppercase Anzeige
@@ -432,77 +471,34 @@ class DiskImageViewer:
         - Shifted space ($A0) -> Space ($20)
         - Andere Bytes bleiben unverändert (inkl. Grafik-Zeichen)
         """
-        if b == 0xA0:  # Shifted space
-            return 0x20
-        elif 0x61 <= b <= 0x7A:  # ASCII lowercase a-z
-            return b - 0x20  # -> PETSCII uppercase A-Z ($41-$5A)
-        else:
-            return b
+        return DIR_NORMALIZE_TABLE[b]
     
     def _format_dir_entry(self, entry):
-        """Formatiert einen Directory-Eintrag"""
+        """Formatiert einen Directory-Eintrag (32 Bytes)"""
+        return self._format_dir_fields(*DIR_ENTRY.unpack(bytes(entry[:32])))
+    
+    def _format_dir_fields(self, raw_file_type, filename, blocks):
+        """Formatiert einen Directory-Eintrag aus den geparsten Feldern"""
         # Format: BBB  "FILENAME        " TYP< (< = locked)
         # Blocks linksbündig, " startet an Position 5 (6. Zeichen)
-        line = bytearray()
-        
-        raw_file_type = entry[2]
-        file_type = raw_file_type & 0x0F
-        locked = (raw_file_type & 0xC0) == 0xC0  # 0xC0-0xC4 = locked
-        blocks = entry[0x1E] + entry[0x1F] * 256
-        filename = entry[5:5+16]
-        
-        # Blocks (linksbündig)
-        blocks_str = str(blocks)
-        for ch in blocks_str:
-            line.append(ord(ch))
-        
-        # Padding bis Position 5 (für ")
-        while len(line) < 5:
-            line.append(0x20)  # Space
-        
-        # Anführungszeichen an Position 5
-        line.append(0x22)  # "
         
         # Filename (16 chars) - KEINE Normalisierung!
-        # $60-$7F sind Grafik-Zeichen in echten C64 Directories
-        for b in filename:
-            if b == 0xA0:  # Nur Shifted Space -> Space
-                line.append(0x20)
-            else:
-                line.append(b)
+        # $60-$7F sind Grafik-Zeichen in echten C64 Directories,
+        # nur Shifted Space -> Space
+        filename = filename.translate(DIR_NAME_TABLE)
         
-        # Anführungszeichen
-        line.append(0x22)  # "
+        line = str(blocks).encode('ascii').ljust(5) + b'"' + filename + b'" '
+        line += DIR_FILE_TYPES[raw_file_type & 0x0F]
         
-        # Space vor File Type
-        line.append(0x20)
+        # Locked Marker (0xC0-0xC4 = locked)
+        if (raw_file_type & 0xC0) == 0xC0:
+            line += b'<'
         
-        # File Type
-        type_names = {0: 'DEL', 1: 'SEQ', 2: 'PRG', 3: 'USR', 4: 'REL'}
-        type_str = type_names.get(file_type, '???')
-        for ch in type_str:
-            line.append(ord(ch))
-        
-        # Locked Marker
-        if locked:
-            line.append(ord('<'))
-        
-        return bytes(line)
+        return line
     
     def _format_blocks_free(self):
         """Formatiert die 'BLOCKS FREE' Zeile"""
-        line = bytearray()
-        
-        blocks_str = str(self.blocks_free)
-        for ch in blocks_str:
-            line.append(ord(ch))
-        
-        line.append(0x20)  # Space
-        
-        for ch in "BLOCKS FREE.":
-            line.append(ord(ch))
-        
-        return bytes(line)
+        return b'%d BLOCKS FREE.' % self.blocks_free
 
 
 def petscii_to_screencode(petscii_byte):
@@ -577,6 +573,18 @@ def petscii_to_screencode_lower(petscii_byte):
         return b - 0x80  # -> $60-$7F
 
 
+# 256-Byte Lookup-Tabellen PETSCII -> Screen Code (für bytes.translate)
+PETSCII_TO_SCREENCODE_UPPER = bytes(petscii_to_screencode(b) for b in range(256))
+PETSCII_TO_SCREENCODE_LOWER = bytes(petscii_to_screencode_lower(b) for b in range(256))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_font(font_path):
+    """Lädt eine Font-Bitmap (upper.bmp / lower.bmp) als L-Image, gecacht pro Pfad"""
+    from PIL import Image
+    return Image.open(font_path).convert('L')
+
+
 def render_directory_to_image(entries, font_path, zoom=2, 
                               bg_color=(63, 63, 215),    # C64 Blau
                               fg_color=(255, 255, 255)): # Weiß
@@ -603,11 +611,11 @@ def render_directory_to_image(entries, font_path, zoom=2,
     # Bestimme ob Lower Font verwendet wird
     use_lower_font = 'lower' in os.path.basename(font_path).lower()
     
-    # Wähle die passende Konvertierungsfunktion
-    convert_func = petscii_to_screencode_lower if use_lower_font else petscii_to_screencode
+    # Wähle die passende Konvertierungstabelle
+    screencode_table = PETSCII_TO_SCREENCODE_LOWER if use_lower_font else PETSCII_TO_SCREENCODE_UPPER
     
-    # Lade Font
-    font_img = Image.open(font_path).convert('L')
+    # Lade Font (gecacht, wird nur gelesen)
+    font_img = _load_font(font_path)
     
     # Font Parameter
     char_width = 8
@@ -625,6 +633,15 @@ def render_directory_to_image(entries, font_path, zoom=2,
     # Erstelle Bild
     screen_img = Image.new('RGB', (img_width, img_height), color=bg_color)
     
+    # Cache für fertig eingefärbte Zeichen-Kacheln: (screen_code, is_reversed) -> Image
+    # Spaces und wiederkehrende Zeichen werden so nur einmal gecroppt/skaliert
+    tile_cache = {}
+    mask_cache = {}
+    tile_width = char_width * zoom
+    tile_height = char_height * zoom
+    fg_tile = Image.new('RGB', (tile_width, tile_height), color=fg_color)
+    bg_tile = Image.new('RGB', (tile_width, tile_height), color=bg_color)
+    
     # Rendere jede Zeile
     y_pos = 0
     line_index = 0
@@ -633,50 +650,51 @@ def render_directory_to_image(entries, font_path, zoom=2,
         x_pos = 0
         char_index = 0
         
-        for petscii_byte in line_bytes:
-            # PETSCII zu Screen Code konvertieren (abhängig vom Font)
-            screen_code = convert_func(petscii_byte)
-            
-            # Position im Font
-            font_col = screen_code % chars_per_row
-            font_row = screen_code // chars_per_row
-            
-            # Extrahiere Zeichen aus Font
-            left = font_col * char_width
-            top = font_row * char_height
-            char_img = font_img.crop((left, top, left + char_width, top + char_height))
-            
-            # Skaliere
-            if zoom != 1:
-                char_img = char_img.resize(
-                    (char_width * zoom, char_height * zoom), 
-                    Image.Resampling.NEAREST
-                )
-            
+        # PETSCII zu Screen Code konvertieren (abhängig vom Font), ganze Zeile auf einmal
+        screen_line = bytes(line_bytes).translate(screencode_table)
+        
+        for screen_code in screen_line:
             # Header-Zeile (erste Zeile) ab Position 2 (dem ") invertiert rendern
             is_reversed = (line_index == 0 and char_index >= 2)
             
-            # Farben für dieses Zeichen
-            if is_reversed:
-                char_fg = bg_color  # Invertiert
-                char_bg = fg_color
-            else:
-                char_fg = fg_color
-                char_bg = bg_color
+            key = (screen_code, is_reversed)
+            tile = tile_cache.get(key)
+            if tile is None:
+                glyph_mask = mask_cache.get(screen_code)
+                if glyph_mask is None:
+                    # Position im Font
+                    font_col = screen_code % chars_per_row
+                    font_row = screen_code // chars_per_row
+                    
+                    # Extrahiere Zeichen aus Font
+                    left = font_col * char_width
+                    top = font_row * char_height
+                    char_img = font_img.crop((left, top, left + char_width, top + char_height))
+                    
+                    # Skaliere
+                    if zoom != 1:
+                        char_img = char_img.resize(
+                            (tile_width, tile_height), 
+                            Image.Resampling.NEAREST
+                        )
+                    
+                    # Maske: Vordergrund wo Pixel > 128
+                    glyph_mask = char_img.point(lambda p: 255 if p > 128 else 0)
+                    mask_cache[screen_code] = glyph_mask
+                
+                # Kachel einmalig per Maske einfärben (invertiert bei reversed)
+                if is_reversed:
+                    tile = Image.composite(bg_tile, fg_tile, glyph_mask)
+                else:
+                    tile = Image.composite(fg_tile, bg_tile, glyph_mask)
+                tile_cache[key] = tile
             
-            # Zeichne Pixel
-            for py in range(char_img.height):
-                for px in range(char_img.width):
-                    pixel = char_img.getpixel((px, py))
-                    if pixel > 128:  # Vordergrund
-                        screen_img.putpixel((x_pos + px, y_pos + py), char_fg)
-                    elif is_reversed:  # Hintergrund nur bei reversed zeichnen
-                        screen_img.putpixel((x_pos + px, y_pos + py), char_bg)
+            screen_img.paste(tile, (x_pos, y_pos))
             
-            x_pos += char_width * zoom
+            x_pos += tile_width
             char_index += 1
         
-        y_pos += char_height * zoom
+        y_pos += tile_height
         line_index += 1
     
     return screen_img
@@ -692,19 +710,17 @@ def show_d64_directory(filepath):
     Returns:
         Liste von Strings für Konsolen-Ausgabe
     """
-    try:
-        from d64 import DiskImage
-        
+    if HAS_D64_LIB:
         lines = []
         with DiskImage(str(filepath)) as image:
             for entry in image.directory():
                 lines.append(str(entry))
         return lines
-    except ImportError:
-        # Fallback auf eigene Implementation
-        viewer = DiskImageViewer(filepath)
-        entries = viewer.read_directory()
-        return [entry.decode('latin-1', errors='replace') for entry in entries]
+    
+    # Fallback auf eigene Implementation
+    viewer = DiskImageViewer(filepath)
+    entries = viewer.read_directory()
+    return [entry.decode('latin-1', errors='replace') for entry in entries]
 
 
 # ============================================================================
@@ -734,25 +750,23 @@ ZIPCODE_END_MARKER_SECTOR = 26
 # Final track/sector for each ZipCode file
 ZIPCODE_FINAL_TS = ((8, 10), (16, 10), (25, 17), (35, 8))
 
+# Precompiled record formats: 2-byte load address, (track|flags, sector) / (len, rep) pairs
+ZIPCODE_LOAD_ADDR = struct.Struct('<H')
+ZIPCODE_BYTE_PAIR = struct.Struct('BB')
 
-def _zipcode_get_sectors_for_track(track):
-    """Return number of sectors for a given track."""
+
+def _zipcode_compute_sectors_for_track(track):
+    """Return number of sectors for a given track (computed from the zone table)."""
     for sectors, track_range in ZIPCODE_TRACK_SECTOR_MAX:
         if track_range[0] <= track <= track_range[1]:
             return sectors
     return 0
 
 
-def _zipcode_get_interleave_for_track(track):
-    """Return interleave value for a given track."""
-    num_sectors = _zipcode_get_sectors_for_track(track)
-    return (num_sectors + 1) // 2
-
-
-def _zipcode_get_sector_order(track):
-    """Return sector order with interleave for a given track."""
-    num_sectors = _zipcode_get_sectors_for_track(track)
-    interleave = _zipcode_get_interleave_for_track(track)
+def _zipcode_compute_sector_order(track):
+    """Return sector order with interleave for a given track (computed)."""
+    num_sectors = _zipcode_compute_sectors_for_track(track)
+    interleave = (num_sectors + 1) // 2
     
     order = []
     for i in range(interleave):
@@ -760,75 +774,105 @@ def _zipcode_get_sector_order(track):
         if i + interleave < num_sectors:
             order.append(i + interleave)
     
-    return order
+    return tuple(order)
 
 
-def _zipcode_block_start(track, sector):
-    """Calculate byte offset in D64 for given track/sector."""
-    import struct
+def _zipcode_compute_track_start(track):
+    """Return index of the first sector of a given track in the D64 (computed)."""
     sector_start = 0
     for sectors, track_range in ZIPCODE_TRACK_SECTOR_MAX:
         if track > track_range[1]:
             sector_start += (track_range[1] - track_range[0] + 1) * sectors
         else:
             sector_start += (track - track_range[0]) * sectors
-            sector_start += sector
             break
-    return sector_start * 0x100
+    return sector_start
 
 
-def _zipcode_read_block(image_fp, track, sector):
-    """Read a 256-byte block from the D64 image."""
+# Per-track lookup tables (index = track, 0..35)
+ZIPCODE_SECTORS_PER_TRACK = tuple(_zipcode_compute_sectors_for_track(t) for t in range(36))
+ZIPCODE_SECTOR_ORDER = tuple(_zipcode_compute_sector_order(t) for t in range(36))
+ZIPCODE_TRACK_OFFSET = tuple(_zipcode_compute_track_start(t) for t in range(36))
+
+
+def _zipcode_get_sectors_for_track(track):
+    """Return number of sectors for a given track."""
+    return ZIPCODE_SECTORS_PER_TRACK[track]
+
+
+def _zipcode_get_interleave_for_track(track):
+    """Return interleave value for a given track."""
+    return (ZIPCODE_SECTORS_PER_TRACK[track] + 1) // 2
+
+
+def _zipcode_get_sector_order(track):
+    """Return sector order with interleave for a given track."""
+    return ZIPCODE_SECTOR_ORDER[track]
+
+
+def _zipcode_block_start(track, sector):
+    """Calculate byte offset in D64 for given track/sector."""
+    return (ZIPCODE_TRACK_OFFSET[track] + sector) * 0x100
+
+
+def _zipcode_read_block(image_data, track, sector):
+    """Read a 256-byte block from the in-memory D64 image."""
     pos = _zipcode_block_start(track, sector)
-    image_fp.seek(pos)
-    data = image_fp.read(0x100)
+    data = image_data[pos:pos + 0x100]
     if len(data) != 0x100:
         raise IOError(f"Could not read full block at track {track}, sector {sector}")
     return data
 
 
+@functools.lru_cache(maxsize=256)
+def _zipcode_run_pattern(rep_byte):
+    """Regex matching runs that become RLE tokens: >= 4 equal bytes or any rep_byte run."""
+    return re.compile(rb'(.)\1{3,}|' + re.escape(bytes((rep_byte,))) + rb'+', re.DOTALL)
+
+
 def _zipcode_compress_block_rle(data, rep_byte):
     """Compress a 256-byte block using RLE."""
     result = bytearray()
-    i = 0
-    
-    while i < len(data):
-        run_byte = data[i]
-        run_length = 1
-        while i + run_length < len(data) and data[i + run_length] == run_byte and run_length < 255:
-            run_length += 1
-        
-        if run_length >= 4 or run_byte == rep_byte:
-            result.append(rep_byte)
-            result.append(run_length)
-            result.append(run_byte)
-            i += run_length
-        else:
-            result.append(run_byte)
-            i += 1
+    pos = 0
+    
+    # Runs are located by the regex engine, literal spans in between are copied in one go
+    for match in _zipcode_run_pattern(rep_byte).finditer(data):
+        start, end = match.span()
+        result += data[pos:start]
+        
+        run_byte = data[start]
+        run_length = end - start
+        while run_length:
+            chunk = min(run_length, 255)
+            if chunk >= 4 or run_byte == rep_byte:
+                result += bytes((rep_byte, chunk, run_byte))
+            else:
+                result += bytes((run_byte,)) * chunk
+            run_length -= chunk
+        pos = end
     
+    result += data[pos:]
     return bytes(result)
 
 
 def _zipcode_find_best_rep_byte(data):
     """Find the best repeat marker byte (one that appears least in data)."""
-    counts = [0] * 256
-    for b in data:
-        counts[b] += 1
-    
-    min_count = min(counts)
-    for i, c in enumerate(counts):
-        if c == min_count:
-            return i
-    return 0
+    # Usually some byte value does not occur at all -> lowest missing value
+    present = set(data)
+    if len(present) < 256:
+        for i in range(256):
+            if i not in present:
+                return i
+    
+    # Every value occurs: count each one (bytes.count runs in C)
+    counts = [data.count(i) for i in range(256)]
+    return counts.index(min(counts))
 
 
 def _zipcode_compress_block(data):
     """Compress a 256-byte block and return (flags, compressed_data)."""
-    import struct
-    
-    # Check for fill block
-    if all(b == data[0] for b in data):
+    # Check for fill block (single memcmp against the repeated first byte)
+    if data == data[:1] * len(data):
         return 1, bytes([data[0]])
     
     # Try RLE compression
@@ -838,7 +882,7 @@ def _zipcode_compress_block(data):
     rle_size = 2 + len(compressed)
     
     if len(compressed) <= 255 and rle_size < 256:
-        chunk = struct.pack('BB', len(compressed), rep_byte) + compressed
+        chunk = ZIPCODE_BYTE_PAIR.pack(len(compressed), rep_byte) + compressed
         return 2, chunk
     
     return 0, data
@@ -854,67 +898,76 @@ def d64_to_zipcode(image_path, out_base, disk_id=None):
     
     Returns: 0 on success, 1 on error
     """
-    import struct
-    
     base_dir, base_name = os.path.split(out_base)
     
+    # D64 is small (~170 KB): read it once and slice blocks from memory
     try:
-        image_fp = open(image_path, 'rb')
+        with open(image_path, 'rb') as image_fp:
+            _advise_sequential_read(image_fp)
+            image_data = image_fp.read()
     except:
         print("ERROR: Cannot open input image:", image_path)
         return 1
     
     # Read disk ID from BAM if not provided
     if disk_id is None:
-        image_fp.seek(_zipcode_block_start(18, 0) + 0xA2)
-        disk_id = image_fp.read(2)
+        id_pos = _zipcode_block_start(18, 0) + 0xA2
+        disk_id = image_data[id_pos:id_pos + 2]
         if len(disk_id) != 2:
             disk_id = b'00'
     
     error_found = False
     created_files = []
     
-    with image_fp:
-        for file_num, (start_track, end_track) in enumerate(ZIPCODE_TRACK_RANGES, 1):
-            part_name = "%d!%s" % (file_num, base_name)
-            fname = os.path.join(base_dir, part_name) if base_dir else part_name
-            
-            try:
-                _zipcode_write_file(image_fp, fname, start_track, end_track, 
-                                   disk_id if file_num == 1 else None)
-                created_files.append(fname)
-            except Exception as e:
-                print(f"ERROR creating {fname}: {e}")
-                error_found = True
+    for file_num, (start_track, end_track) in enumerate(ZIPCODE_TRACK_RANGES, 1):
+        part_name = "%d!%s" % (file_num, base_name)
+        fname = os.path.join(base_dir, part_name) if base_dir else part_name
+        
+        try:
+            _zipcode_write_file(image_data, fname, start_track, end_track, 
+                               disk_id if file_num == 1 else None)
+            created_files.append(fname)
+        except Exception as e:
+            print(f"ERROR creating {fname}: {e}")
+            error_found = True
     
     return (1 if error_found else 0), created_files
 
 
-def _zipcode_write_file(image_fp, out_path, start_track, end_track, disk_id=None):
+def _zipcode_write_file(image_data, out_path, start_track, end_track, disk_id=None):
     """Write a single ZipCode file covering the specified track range."""
-    import struct
+    # Collect the whole file in memory and write it with a single call
+    out = bytearray()
+    if disk_id is not None:
+        out += ZIPCODE_LOAD_ADDR.pack(0x03FE)
+        out += disk_id
+    else:
+        out += ZIPCODE_LOAD_ADDR.pack(0x0400)
     
-    with open(out_path, 'wb') as zip_fp:
-        if disk_id is not None:
-            zip_fp.write(struct.pack('<H', 0x03FE))
-            zip_fp.write(disk_id)
-        else:
-            zip_fp.write(struct.pack('<H', 0x0400))
+    # Identical blocks (empty sectors, file slack) compress identically:
+    # remember results by block contents
+    compressed_cache = {}
+    
+    for track in range(start_track, end_track + 1):
+        sector_order = _zipcode_get_sector_order(track)
         
-        for track in range(start_track, end_track + 1):
-            sector_order = _zipcode_get_sector_order(track)
+        for sector in sector_order:
+            data = _zipcode_read_block(image_data, track, sector)
+            hit = compressed_cache.get(data)
+            if hit is None:
+                hit = compressed_cache[data] = _zipcode_compress_block(data)
+            flags, compressed = hit
             
-            for sector in sector_order:
-                data = _zipcode_read_block(image_fp, track, sector)
-                flags, compressed = _zipcode_compress_block(data)
-                
-                track_flags = track | (flags << 6)
-                zip_fp.write(struct.pack('BB', track_flags, sector))
-                zip_fp.write(compressed)
-        
-        # Write end marker
-        track_flags = ZIPCODE_END_MARKER_TRACK | (1 << 6)
-        zip_fp.write(struct.pack('BB', track_flags, ZIPCODE_END_MARKER_SECTOR))
+            track_flags = track | (flags << 6)
+            out += ZIPCODE_BYTE_PAIR.pack(track_flags, sector)
+            out += compressed
+    
+    # Write end marker
+    track_flags = ZIPCODE_END_MARKER_TRACK | (1 << 6)
+    out += ZIPCODE_BYTE_PAIR.pack(track_flags, ZIPCODE_END_MARKER_SECTOR)
+    
+    with open(out_path, 'wb') as zip_fp:
+        zip_fp.write(out)
 
 
 def zipcode_to_d64(in_base, out_path):
@@ -926,8 +979,6 @@ def zipcode_to_d64(in_base, out_path):
     
     Returns: 0 on success, 1 on error
     """
-    import struct
-    
     error_found = False
     base_dir, base_name = os.path.split(in_base)
     
@@ -951,12 +1002,58 @@ def zipcode_to_d64(in_base, out_path):
     return 1 if error_found else 0
 
 
+def _zipcode_decode_raw(zip_fp):
+    """Uncompressed block: 256 data bytes follow."""
+    return zip_fp.read(0x100)
+
+
+def _zipcode_decode_fill(zip_fp):
+    """Fill block: a single byte repeated 256 times."""
+    return zip_fp.read(1) * 0x100
+
+
+def _zipcode_decode_rle(zip_fp):
+    """RLE block: (length, rep byte) headers followed by RLE data."""
+    # Expand into a preallocated block with index cursors
+    # (slice assignment grows the buffer on corrupt data, so the
+    # length check in the caller still rejects oversized blocks)
+    out = bytearray(0x100)
+    op = 0
+    while op < 0x100:
+        dlen, rep = ZIPCODE_BYTE_PAIR.unpack(zip_fp.read(2))
+        zdata = zip_fp.read(dlen)
+        zp = 0
+        
+        # Copy literal spans up to the next rep marker in one go
+        while True:
+            idx = zdata.find(rep, zp)
+            if idx < 0:
+                out[op:op + len(zdata) - zp] = zdata[zp:]
+                op += len(zdata) - zp
+                break
+            out[op:op + idx - zp] = zdata[zp:idx]
+            op += idx - zp
+            run = zdata[idx + 1]
+            out[op:op + run] = bytes((zdata[idx + 2],)) * run
+            op += run
+            zp = idx + 3
+    return out[:op]
+
+
+def _zipcode_decode_unknown(zip_fp):
+    """Flags value 3 is unused: no data, the block is skipped."""
+    return b''
+
+
+# Block decoders indexed by the 2 flag bits of the track byte
+ZIPCODE_DECODERS = (_zipcode_decode_raw, _zipcode_decode_fill,
+                    _zipcode_decode_rle, _zipcode_decode_unknown)
+
+
 def _zipcode_convert_file(fname, image_fp):
     """Convert a single ZipCode file to D64 blocks."""
-    import struct
-    
     with open(fname, 'rb') as zip_fp:
-        (start_addr,) = struct.unpack('<H', zip_fp.read(2))
+        (start_addr,) = ZIPCODE_LOAD_ADDR.unpack(zip_fp.read(2))
         if start_addr == 0x03FE:
             _ = zip_fp.read(2)  # disk ID
         
@@ -965,34 +1062,13 @@ def _zipcode_convert_file(fname, image_fp):
             if len(val) == 0:
                 return
             
-            data = bytes()
-            track_flags, sector = struct.unpack('BB', val)
-            flags = (track_flags & 0xC0) >> 6
+            track_flags, sector = ZIPCODE_BYTE_PAIR.unpack(val)
             track = track_flags & 0x3F
             
             if track > 35:
                 return  # End marker or invalid
             
-            if flags == 0:
-                data = zip_fp.read(0x100)
-            
-            elif flags == 1:
-                fill_byte = zip_fp.read(1)
-                data = fill_byte * 0x100
-            
-            elif flags == 2:
-                while len(data) < 0x100:
-                    dlen, rep = struct.unpack('BB', zip_fp.read(2))
-                    zdata = zip_fp.read(dlen)
-                    
-                    while zdata:
-                        b = zdata[0]
-                        if b == rep:
-                            data += bytes([zdata[2]]) * zdata[1]
-                            zdata = zdata[3:]
-                        else:
-                            data += bytes([b])
-                            zdata = zdata[1:]
+            data = ZIPCODE_DECODERS[track_flags >> 6](zip_fp)
             
             if len(data) == 256:
                 pos = _zipcode_block_start(track, sector)
@@ -1027,31 +1103,68 @@ for _t in range(1, 36):
 
 LNX_D64_SIZE = _cum  # 174848 Bytes
 
+# Byteoffset je Track/Sektor: LNX_TS_OFFSET[track][sector] (Track 0 leer)
+LNX_TS_OFFSET = tuple(
+    tuple(LNX_TRACK_OFFSETS[t] + s * 256 for s in range(LNX_TRACK_SECTORS[t]))
+    for t in range(36)
+)
+
+# Alle Datensektoren (ohne Directory-Track 18) in Vergabe-Reihenfolge
+LNX_FREE_TS = tuple(
+    (t, s)
+    for t in range(1, 36) if t != 18
+    for s in range(LNX_TRACK_SECTORS[t])
+)
+
+# ASCII -> PETSCII für Dateinamen: a-z -> A-Z, nicht druckbare Zeichen -> Space
+LNX_PETSCII_TABLE = bytes(
+    c - 32 if 97 <= c <= 122 else c if 32 <= c < 128 else 32
+    for c in range(256)
+)
+
+# LNX Header: "\r <DirBlocks> <Signatur>\r <NumFiles>..."
+LNX_HEADER_RE = re.compile(rb'\r (\d+) *([^\r]*)(?:\r *(\d+)[^\r]*)?')
+
+# LNX Directory-Eintrag: "<Name>\r <Blocks>\r<Typ>\r <LastBytes>"
+LNX_ENTRY_RE = re.compile(rb'([^\r]*)\r *(\d+)[^\r]*\r(.). *(\d+)[^\r]*', re.DOTALL)
+
+
+@dataclass
+class LynxEntry:
+    """Ein Datei-Eintrag aus dem LNX-Directory."""
+    __slots__ = ('name', 'blocks', 'ftype', 'last_bytes', 'data_offset', 'total_bytes')
+    
+    name: str
+    blocks: int
+    ftype: str
+    last_bytes: int
+    data_offset: int
+    total_bytes: int
+
 
 def _lnx_ts_to_offset(track, sector):
-    """Track/Sektor -> Byteoffset im D64."""
+    """Track/Sektor -> Byteoffset im D64 (ohne Prüfung, nur für interne Werte)."""
+    return LNX_TS_OFFSET[track][sector]
+
+
+def _lnx_ts_to_offset_checked(track, sector):
+    """Track/Sektor -> Byteoffset im D64, mit Prüfung für externe Eingaben."""
     if not (1 <= track <= 35):
         raise ValueError(f"Ungültiger Track: {track}")
     if not (0 <= sector < LNX_TRACK_SECTORS[track]):
         raise ValueError(f"Ungültiger Sektor {sector} auf Track {track}")
-    return LNX_TRACK_OFFSETS[track] + sector * 256
+    return LNX_TS_OFFSET[track][sector]
 
 
 def _lnx_ascii_to_petscii_name(name):
     """Namen für das Directory in PETSCII wandeln (16 Bytes, mit $A0 gepaddet)."""
     name = name[:16]
-    out = bytearray()
-    for ch in name:
-        c = ord(ch)
-        if 97 <= c <= 122:
-            c -= 32
-        if 32 <= c < 128:
-            out.append(c)
-        else:
-            out.append(32)
-    while len(out) < 16:
-        out.append(0xA0)
-    return bytes(out)
+    if name.isascii():
+        raw = name.encode('ascii')
+    else:
+        # Nicht-ASCII Zeichen -> Space (wie Steuerzeichen)
+        raw = bytes(c if c < 128 else 32 for c in map(ord, name))
+    return raw.translate(LNX_PETSCII_TABLE).ljust(16, b'\xA0')
 
 
 def _lnx_parse(buf):
@@ -1060,102 +1173,38 @@ def _lnx_parse(buf):
     
     Returns: (dir_blocks, num_files, signature, entries_list)
     """
-    from dataclasses import dataclass
-    
-    @dataclass
-    class LynxEntry:
-        name: str
-        blocks: int
-        ftype: str
-        last_bytes: int
-        data_offset: int
-        total_bytes: int
-    
     v = buf
     vlen = len(v)
     
-    # DirBlocks-Zeile finden
-    dir_pos = None
-    for i in range(0x20, min(vlen - 3, 0x200)):
-        if v[i] == 0x0D and v[i + 1] == 0x20 and 0x30 <= v[i + 2] <= 0x39:
-            dir_pos = i
-            break
-    if dir_pos is None:
+    # DirBlocks-Zeile finden: "\r <DirBlocks> <Signatur>\r <NumFiles>..."
+    header = LNX_HEADER_RE.search(v, 0x20)
+    if header is None or header.start() >= min(vlen - 3, 0x200):
         raise ValueError("DirBlocks-Zeile im LNX-Header nicht gefunden")
     
-    i = dir_pos + 1
-    while i < vlen and v[i] == 0x20:
-        i += 1
-    dstart = i
-    while i < vlen and 0x30 <= v[i] <= 0x39:
-        i += 1
-    if dstart == i:
-        raise ValueError("DirBlocks-Zahl nicht gefunden")
-    dir_blocks = int(v[dstart:i].decode("ascii"))
-    
-    while i < vlen and v[i] == 0x20:
-        i += 1
-    sig_start = i
-    while i < vlen and v[i] != 0x0D:
-        i += 1
-    sig = v[sig_start:i].decode("ascii", errors="replace")
-    numline_cr = i
+    dir_blocks = int(header.group(1))
+    sig = header.group(2).decode("ascii", errors="replace")
     
     # NumFiles lesen
-    j = numline_cr + 1
-    while j < vlen and v[j] == 0x20:
-        j += 1
-    nf_start = j
-    while j < vlen and 0x30 <= v[j] <= 0x39:
-        j += 1
-    if nf_start == j:
+    if header.group(3) is None:
         raise ValueError("NumFiles-Zahl nicht gefunden")
-    num_files = int(v[nf_start:j].decode("ascii"))
-    
-    while j < vlen and v[j] != 0x0D:
-        j += 1
-    pos = j + 1
+    num_files = int(header.group(3))
+    pos = header.end() + 1
     
     data_start = dir_blocks * 254
     entries = []
     cur_block = 0
     
     for fi in range(num_files):
-        # Dateiname
-        name_start = pos
-        while pos < vlen and v[pos] != 0x0D:
-            pos += 1
-        name_bytes = v[name_start:pos]
-        name = name_bytes.decode("ascii", errors="replace")
-        pos += 1
-        
-        # Blocks
-        k = pos
-        while k < vlen and v[k] == 0x20:
-            k += 1
-        bstart = k
-        while k < vlen and 0x30 <= v[k] <= 0x39:
-            k += 1
-        blocks = int(v[bstart:k].decode("ascii"))
-        while k < vlen and v[k] != 0x0D:
-            k += 1
-        pos = k + 1
-        
-        # Typ
-        ftype_ch = chr(v[pos])
-        pos += 2
-        
-        # LastBytes
-        k = pos
-        while k < vlen and v[k] == 0x20:
-            k += 1
-        lbstart = k
-        while k < vlen and 0x30 <= v[k] <= 0x39:
-            k += 1
-        last_bytes = int(v[lbstart:k].decode("ascii"))
-        while k < vlen and v[k] != 0x0D:
-            k += 1
-        pos = k + 1
+        # Dateiname, Blocks, Typ, LastBytes
+        m = LNX_ENTRY_RE.match(v, pos)
+        if m is None:
+            raise ValueError(f"Ungültiger Directory-Eintrag {fi + 1} im LNX-Header")
+        pos = m.end() + 1
+        
+        name = m.group(1).decode("ascii", errors="replace")
+        blocks = int(m.group(2))
+        ftype_ch = chr(m.group(3)[0])
+        last_bytes = int(m.group(4))
         
         total_bytes = (blocks - 1) * 254 + last_bytes
         data_offset = data_start + cur_block * 254
@@ -1177,29 +1226,27 @@ def _lnx_build_d64(entries, buf, diskname="LYNX-DISK"):
     """Erzeugt ein D64-Image aus Lynx-Einträgen."""
     
     image = bytearray(LNX_D64_SIZE)
-    used_ts = set()
-    used_ts.add((18, 0))
+    # Belegte Sektoren als Bitmaske pro Track (Bit s = Sektor s)
+    used_mask = [0] * 36
+    used_mask[18] |= 1 << 0
     
-    free_ts = []
-    for t in range(1, 36):
-        if t == 18:
-            continue
-        for s in range(LNX_TRACK_SECTORS[t]):
-            free_ts.append((t, s))
+    # Freie Sektoren werden der Reihe nach aus LNX_FREE_TS vergeben
+    free_cursor = 0
     
     file_count = len(entries)
     dir_sectors_needed = (file_count + 7) // 8 or 1
     dir_sectors = list(range(1, 1 + dir_sectors_needed))
     
     for i, sec in enumerate(dir_sectors):
-        off = _lnx_ts_to_offset(18, sec)
+        # Anzahl Directory-Sektoren hängt von der Dateianzahl ab -> geprüft
+        off = _lnx_ts_to_offset_checked(18, sec)
         if i < len(dir_sectors) - 1:
             image[off + 0] = 18
             image[off + 1] = dir_sectors[i + 1]
         else:
             image[off + 0] = 0
             image[off + 1] = 0xFF
-        used_ts.add((18, sec))
+        used_mask[18] |= 1 << sec
     
     bam_off = _lnx_ts_to_offset(18, 0)
     image[bam_off + 0] = 18
@@ -1238,33 +1285,27 @@ def _lnx_build_d64(entries, buf, diskname="LYNX-DISK"):
         file_data = buf[start:end]
         
         n_sectors = (len(file_data) + 253) // 254
-        if len(free_ts) < n_sectors:
+        if free_cursor + n_sectors > len(LNX_FREE_TS):
             raise ValueError("Nicht genug Platz im D64-Image.")
         
-        allocated = free_ts[:n_sectors]
-        free_ts = free_ts[n_sectors:]
+        allocated = LNX_FREE_TS[free_cursor:free_cursor + n_sectors]
+        free_cursor += n_sectors
         
-        for si in range(n_sectors):
-            t, s = allocated[si]
-            used_ts.add((t, s))
-            off = _lnx_ts_to_offset(t, s)
-            chunk_start = si * 254
-            chunk_end = min(chunk_start + 254, len(file_data))
-            chunk = file_data[chunk_start:chunk_end]
-            
-            if si < n_sectors - 1:
-                nt, ns = allocated[si + 1]
-                image[off + 0] = nt
-                image[off + 1] = ns
-                image[off + 2:off + 2 + len(chunk)] = chunk
-            else:
-                image[off + 0] = 0
-                used = len(chunk)
-                eof_pos = 1 + used
-                if eof_pos > 255:
-                    eof_pos = 255
-                image[off + 1] = eof_pos
-                image[off + 2:off + 2 + used] = chunk
+        for t, s in allocated:
+            used_mask[t] |= 1 << s
+        
+        # Link-Bytes je Sektor: Track/Sektor des Folgesektors,
+        # im letzten Sektor 0 / Position des letzten Bytes
+        last_used = len(file_data) - (n_sectors - 1) * 254
+        links = allocated[1:] + ((0, min(1 + last_used, 255)),)
+        
+        chunk_start = 0
+        for (t, s), link in zip(allocated, links):
+            off = LNX_TS_OFFSET[t][s]
+            chunk = file_data[chunk_start:chunk_start + 254]
+            image[off:off + 2] = bytes(link)
+            image[off + 2:off + 2 + len(chunk)] = chunk
+            chunk_start += 254
         
         dir_sec_index = idx // 8
         entry_index = idx % 8
@@ -1286,30 +1327,17 @@ def _lnx_build_d64(entries, buf, diskname="LYNX-DISK"):
         image[entry_off + 30] = n_sectors & 0xFF
         image[entry_off + 31] = (n_sectors >> 8) & 0xFF
     
-    # BAM füllen
+    # BAM füllen: freie Sektoren = alle Sektoren des Tracks ohne belegte
     bam_ptr = bam_off + 0x04
     for track in range(1, 36):
-        sectors = LNX_TRACK_SECTORS[track]
-        free_count = 0
-        b0 = b1 = b2 = 0
-        for sec in range(sectors):
-            if (track, sec) not in used_ts:
-                free_count += 1
-                bit = 1 << (sec & 7)
-                if sec < 8:
-                    b0 |= bit
-                elif sec < 16:
-                    b1 |= bit
-                else:
-                    b2 |= bit
+        free_mask = ((1 << LNX_TRACK_SECTORS[track]) - 1) & ~used_mask[track]
         
-        image[bam_ptr + 0] = free_count
-        image[bam_ptr + 1] = b0
-        image[bam_ptr + 2] = b1
-        image[bam_ptr + 3] = b2
+        image[bam_ptr] = bin(free_mask).count('1')
+        image[bam_ptr + 1:bam_ptr + 4] = free_mask.to_bytes(3, 'little')
         bam_ptr += 4
     
-    return bytes(image)
+    # bytearray direkt zurückgeben, f.write() braucht keine bytes-Kopie
+    return image
 
 
 def lnx_to_d64(lnx_path, out_path):
@@ -1321,8 +1349,6 @@ def lnx_to_d64(lnx_path, out_path):
     
     Returns: 0 on success, 1 on error
     """
-    import sys
-    
     if not os.path.isfile(lnx_path):
         candidates = [
             lnx_path + ".lnx",
@@ -1340,6 +1366,7 @@ def lnx_to_d64(lnx_path, out_path):
         return 1
     
     with open(lnx_path, "rb") as f:
+        _advise_sequential_read(f)
         buf = f.read()
     
     try:
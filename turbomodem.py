@@ -13,11 +13,93 @@ Performance:
 - TurboModem: ~500 KB/s - 2 MB/s ✅
 """
 
+import functools
 import struct
 import zlib
 import time
 import datetime
 
+from fileio import open_preallocated
+
+# Optional: python-isal (ISA-L) liefert eine PCLMULQDQ/PMULL-beschleunigte
+# CRC-32 mit identischem Polynom und Ergebnis wie zlib.crc32
+try:
+    from isal import isal_zlib
+    HAS_ISAL = True
+except ImportError:
+    HAS_ISAL = False
+
+
+# CRC-32 Prüfwert ("123456789"), vorzeichenlos wie zlib.crc32 unter Python 3
+CRC32_CHECK = 0xCBF43926
+
+
+def _select_crc32():
+    """Wählt beim Import die schnellste verfügbare CRC-32 Implementierung.
+    
+    Die gewählte Funktion muss den Prüfwert vorzeichenlos liefern - nur
+    deshalb kann im Hot Path das frühere '& 0xFFFFFFFF' entfallen.
+    """
+    # ISA-L wählt die CPU-Implementierung (PCLMULQDQ/PMULL) intern selbst
+    if HAS_ISAL and isal_zlib.crc32(b'123456789') == CRC32_CHECK:
+        return isal_zlib.crc32
+    return zlib.crc32
+
+
+crc32 = _select_crc32()
+
+
+@functools.lru_cache(maxsize=16)
+def _pattern_dfa(pattern):
+    """KMP-Automat für pattern: dfa[zustand][byte] -> neuer Zustand.
+    
+    Zustand = Anzahl Pattern-Bytes die am Ende des bisher Gelesenen passen,
+    len(pattern) bedeutet Treffer.
+    """
+    dfa = [[0] * 256]
+    dfa[0][pattern[0]] = 1
+    restart = 0
+    for j in range(1, len(pattern)):
+        row = list(dfa[restart])
+        row[pattern[j]] = j + 1
+        dfa.append(row)
+        restart = dfa[restart][pattern[j]]
+    return tuple(bytes(row) for row in dfa)
+
+
+def _window_crcs(window):
+    """CRC-32 jedes BLOCK_SIZE-Blocks in window (letzter Block mit Nullen gepaddet)."""
+    mv = memoryview(window)
+    crcs = [crc32(mv[pos:pos + BLOCK_SIZE]) for pos in range(0, len(window), BLOCK_SIZE)]
+    tail = len(window) % BLOCK_SIZE
+    if tail:
+        # Padding-Nullen in die CRC des letzten Blocks einrechnen
+        crcs[-1] = crc32(bytes(BLOCK_SIZE - tail), crcs[-1])
+    return crcs
+
+
+def _write_blocks(f, bufs):
+    """Schreibt bufs (bytes/memoryviews) mit einem writev-Syscall.
+    
+    Ohne os.writev (Windows) wird einmal zusammengefügt geschrieben.
+    """
+    import os
+    if not hasattr(os, 'writev'):
+        # Auch ungepufferte Dateien (raw write) können kürzer schreiben
+        rest = memoryview(b''.join(bufs))
+        while rest:
+            rest = rest[f.write(rest):]
+        return
+    fd = f.fileno()
+    written = os.writev(fd, bufs)
+    total = sum(map(len, bufs))
+    if written < total:
+        # Teilweiser Write (z.B. durch Signal) - Rest einzeln nachschieben
+        rest = memoryview(b''.join(bufs))[written:]
+        while rest:
+            rest = rest[os.write(fd, rest):]
+
+
 # Protocol Constants
 MAGIC = b'TB'  # TurboBlock
 CMD_REQUEST = b'TBRQ'  # Client requests transfer
@@ -30,7 +112,18 @@ CMD_CAN = b'TBCAN'  # Cancel transfer
 
 BLOCK_SIZE = 4096  # 4 KB blocks
 WINDOW_SIZE = 8  # 8 blocks without ACK = 32 KB pipeline
+FULL_MASKS = tuple((1 << k) - 1 for k in range(WINDOW_SIZE + 1))  # Bitmaske für k Blöcke
 MAX_RETRIES = 16
+RECV_AHEAD = 64 * 1024  # Max. Read-Ahead für Blockdaten im Direct-Socket-Modus (Überschuss → _drain_buf)
+
+# Block-Framing: [MAGIC: 2B][Block#: 4B][Size: 2B][Data: BLOCK_SIZE][CRC-32: 4B]
+BLOCK_HEADER = struct.Struct('>2sIH')
+BLOCK_CRC = struct.Struct('>I')
+FRAME_SIZE = BLOCK_HEADER.size + BLOCK_SIZE + BLOCK_CRC.size
+
+# Datei-Header: [TBOK: 4B][Filesize: 8B][FilenameLen: 2B] + Filename
+OK_HEADER = struct.Struct('>4sQH')
+FILE_INFO = struct.Struct('>QH')  # Teil nach TBOK
 
 
 class TurboModem:
@@ -46,11 +139,25 @@ class TurboModem:
                             (needed when BBS does Telnet escaping on binary data)
         """
         self.conn = connection
+        
+        # Verbindungsart einmalig bestimmen statt hasattr() bei jedem Send/Recv
+        if hasattr(connection, 'send_raw'):
+            self._send_impl = connection.send_raw   # BBSTelnetClient
+        elif hasattr(connection, 'sendall'):
+            self._send_impl = connection.sendall    # Socket
+        else:
+            self._send_impl = connection.send       # Fallback
+        self._send_returns_result = hasattr(connection, 'send_raw')
+        self._recv_queue = getattr(connection, 'get_received_data_raw', None)
         self.debug = debug
         self.telnet_unescape = telnet_unescape
         self.debug_log = []
         self._raw_sock = None      # Direct socket for fast transfers
+        self._raw_timeout = None   # Zuletzt gesetzter Timeout am _raw_sock
         self._drain_buf = bytearray()  # Drained queue data
+        self._tx_pad = bytearray(BLOCK_SIZE)  # Puffer für den letzten (kurzen) Block
+        self._tx_frame = bytearray(FRAME_SIZE)  # Wiederverwendeter Sende-Frame
+        self._tx_window = bytearray(WINDOW_SIZE * FRAME_SIZE)  # Frames eines Windows
         
         self.stats = {
             'blocks_sent': 0,
@@ -100,22 +207,128 @@ class TurboModem:
     
     def _send(self, data):
         """Send data - works with both Socket and BBSTelnetClient"""
-        self.log(f"_send: {len(data)} bytes - {data[:20].hex() if len(data) > 20 else data.hex()}")
-        if hasattr(self.conn, 'send_raw'):
-            # BBSTelnetClient
-            result = self.conn.send_raw(data)
-            self.log(f"_send: send_raw() returned {result}")
-            return result
-        elif hasattr(self.conn, 'sendall'):
-            # Socket
-            self.conn.sendall(data)
-            self.log(f"_send: sendall() done")
-            return True
-        else:
-            # Fallback
-            self.conn.send(data)
-            self.log(f"_send: send() fallback done")
-            return True
+        if self.debug:
+            self.log(f"_send: {len(data)} bytes - {data[:20].hex() if len(data) > 20 else data.hex()}")
+        result = self._send_impl(data)
+        if self.debug:
+            self.log(f"_send: {getattr(self._send_impl, '__name__', 'send')}() returned {result}")
+        # Nur send_raw() liefert ein Ergebnis, sendall()/send() gelten als Erfolg
+        return result if self._send_returns_result else True
+    
+    def _pad_block(self, data):
+        """Liefert data auf BLOCK_SIZE mit Nullen aufgefüllt.
+        
+        Volle Blöcke werden unverändert (ohne Kopie) zurückgegeben, kurze
+        Blöcke in den wiederverwendeten _tx_pad Puffer kopiert. Das Ergebnis
+        ist nur bis zum nächsten Aufruf gültig.
+        """
+        n = len(data)
+        if n >= BLOCK_SIZE:
+            return data
+        pad = self._tx_pad
+        pad[:n] = data
+        pad[n:] = bytes(BLOCK_SIZE - n)
+        return pad
+    
+    def _frame_block(self, block_num, data, crc):
+        """Baut Header + Daten + CRC in den wiederverwendeten _tx_frame Puffer.
+        
+        data muss bereits auf BLOCK_SIZE gepaddet sein. Das Ergebnis ist nur
+        bis zum nächsten Aufruf gültig (alle Sendepfade kopieren synchron).
+        """
+        frame = self._tx_frame
+        BLOCK_HEADER.pack_into(frame, 0, MAGIC, block_num, BLOCK_SIZE)
+        frame[BLOCK_HEADER.size:BLOCK_HEADER.size + BLOCK_SIZE] = data
+        BLOCK_CRC.pack_into(frame, BLOCK_HEADER.size + BLOCK_SIZE, crc)
+        return frame
+    
+    def _build_window(self, window, crcs, block_num):
+        """Baut alle Frames eines Windows direkt in den _tx_window Puffer.
+        
+        window: bis zu WINDOW_SIZE * BLOCK_SIZE Dateidaten, der letzte Block
+        wird mit Nullen aufgefüllt. crcs: vorberechnete Block-CRCs (siehe
+        _window_crcs). Es entstehen keine Zwischenkopien pro Block.
+        
+        Returns:
+            (frames, anzahl_blöcke) - frames ist nur bis zum nächsten Aufruf gültig
+        """
+        buf = self._tx_window
+        buf_mv = memoryview(buf)
+        window_mv = memoryview(window)
+        data_start = BLOCK_HEADER.size
+        pos = 0
+        n_blocks = 0
+        for src in range(0, len(window), BLOCK_SIZE):
+            chunk = window_mv[src:src + BLOCK_SIZE]
+            n = len(chunk)
+            data = pos + data_start
+            BLOCK_HEADER.pack_into(buf, pos, MAGIC, block_num + n_blocks, BLOCK_SIZE)
+            buf_mv[data:data + n] = chunk
+            if n < BLOCK_SIZE:
+                buf_mv[data + n:data + BLOCK_SIZE] = bytes(BLOCK_SIZE - n)
+            BLOCK_CRC.pack_into(buf, data + BLOCK_SIZE, crcs[n_blocks])
+            pos += FRAME_SIZE
+            n_blocks += 1
+        buf_mv.release()
+        # Volles Window ohne Kopie, nur das letzte (kürzere) wird geschnitten
+        return (buf if pos == len(buf) else buf[:pos]), n_blocks
+    
+    def _prefetch_windows(self, filepath, filesize, window_bytes):
+        """Liest die Datei in einem Hintergrund-Thread windowweise voraus.
+        
+        Generator: liefert (daten, block_crcs) mit Stücken von window_bytes
+        (das letzte ggf. kürzer), insgesamt höchstens filesize Bytes. Während
+        ein Window gesendet bzw. auf das ACK gewartet wird, liest der Thread
+        bereits das nächste (max. 2 im Voraus) und berechnet dessen CRCs.
+        Wird der Generator vorzeitig verlassen, beendet sich der Thread.
+        """
+        import os
+        import threading
+        from queue import Queue, Full
+        
+        windows = Queue(maxsize=2)
+        stop = threading.Event()
+        
+        def put(item):
+            while not stop.is_set():
+                try:
+                    windows.put(item, timeout=0.2)
+                    return True
+                except Full:
+                    pass
+            return False
+        
+        def reader():
+            try:
+                with open(filepath, 'rb') as f:
+                    try:
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    except (AttributeError, OSError):
+                        pass
+                    remaining = filesize
+                    while remaining > 0:
+                        buf = f.read(min(window_bytes, remaining))
+                        if not buf:
+                            break
+                        remaining -= len(buf)
+                        if not put((buf, _window_crcs(buf))):
+                            return
+                put(None)
+            except Exception as e:
+                put(e)
+        
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = windows.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
     
     def _send_with_escape(self, data):
         """Send data with Telnet escaping if in direct socket BBS mode.
@@ -124,7 +337,8 @@ class TurboModem:
             # Direct socket mode with Telnet active - must escape 0xFF
             if b'\xff' in data:
                 escaped = data.replace(b'\xff', b'\xff\xff')
-                self.log(f"_send_with_escape: {len(data)}→{len(escaped)} bytes (escaped)")
+                if self.debug:
+                    self.log(f"_send_with_escape: {len(data)}→{len(escaped)} bytes (escaped)")
                 self._send_paced(escaped)
             else:
                 self._send_paced(data)
@@ -142,7 +356,7 @@ class TurboModem:
         while offset < len(data):
             chunk = data[offset:offset + CHUNK]
             # Use sendall in blocking mode - it will wait for buffer space
-            self._raw_sock.settimeout(60)  # 60s timeout per chunk
+            self._set_raw_timeout(60)  # 60s timeout per chunk
             try:
                 self._raw_sock.sendall(chunk)
             except Exception:
@@ -151,9 +365,41 @@ class TurboModem:
                 self._raw_sock.sendall(chunk)
             offset += len(chunk)
     
+    def _set_raw_timeout(self, timeout):
+        """settimeout() am _raw_sock nur bei Änderung - jeder Aufruf ist ein Syscall."""
+        if timeout != self._raw_timeout:
+            self._raw_sock.settimeout(timeout)
+            self._raw_timeout = timeout
+    
+    def _tune_socket_buffers(self):
+        """TCP_NODELAY und Socket-Buffer für ein ganzes Window setzen.
+        
+        Nur für direkte Socket-Verbindungen: BBSTelnetClient/WinUAE-Pfade
+        behalten ihre absichtlich kleinen Buffer (siehe _start_fast_recv).
+        Buffer werden nur vergrößert, nie verkleinert.
+        """
+        if not hasattr(self.conn, 'setsockopt'):
+            return
+        import socket
+        want = 2 * WINDOW_SIZE * FRAME_SIZE
+        try:
+            self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, AttributeError):
+            pass  # kein TCP Socket (z.B. socketpair)
+        for opt in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+            try:
+                if self.conn.getsockopt(socket.SOL_SOCKET, opt) < want:
+                    self.conn.setsockopt(socket.SOL_SOCKET, opt, want)
+            except (OSError, AttributeError):
+                pass
+    
     def _check_cancel(self):
         """Non-blocking check for TBCAN from receiver"""
         import select, socket
+        # TBCAN kann schon per Read-Ahead in _drain_buf gelandet sein
+        if CMD_CAN in self._drain_buf:
+            self.log("CANCEL detected from receiver!")
+            raise Exception("Transfer cancelled by receiver")
         if self._raw_sock:
             try:
                 ready, _, _ = select.select([self._raw_sock], [], [], 0)
@@ -274,6 +520,7 @@ class TurboModem:
         # Save original timeout and set to blocking for large transfers
         self._orig_sock_timeout = self._raw_sock.gettimeout()
         self._raw_sock.settimeout(None)  # Blocking - sendall() won't timeout
+        self._raw_timeout = None
         # Limit send buffer to prevent overwhelming WinUAE bsdsocket emulation
         import socket
         try:
@@ -330,14 +577,24 @@ class TurboModem:
             return self._recv_exact_unesc(size, timeout)
         return self._recv_exact(size, timeout)
     
-    def _recv_exact(self, size, timeout=3.0):
+    def _recv_exact(self, size, timeout=3.0, into=None, ahead=0):
         """
         Empfängt exakt 'size' Bytes
         
+        Args:
+            into: Optionaler beschreibbarer memoryview (>= size Bytes), in den
+                  statt in ein neues bytes-Objekt empfangen wird
+            ahead: Im Direct-Socket-Modus bis zu so viele Bytes auf einmal
+                   lesen (max. RECV_AHEAD), Überschuss landet in _drain_buf.
+                   Nur für Blockdaten, deren Länge feststeht - Steuerdaten
+                   (Header, EOT, ACK, TBND) lesen nur want + 128, sonst
+                   würde z.B. die BBS-Ausgabe nach dem Transfer mitgelesen
+        
         Returns:
-            bytes oder None bei Timeout/Error
+            bytes (bzw. into[:size]) oder None bei Timeout/Error
         """
-        import time
+        # Monotone Uhr (unabhängig von Uhrzeit-Korrekturen), lokal gebunden
+        now = time.monotonic
         
         # FAST PATH: Direct socket (during file transfer)
         if self._raw_sock:
@@ -348,19 +605,23 @@ class TurboModem:
                 data.extend(self._drain_buf[:take])
                 del self._drain_buf[:take]
                 if len(data) >= size:
-                    return bytes(data[:size])
+                    if into is not None:
+                        into[:size] = data
+                        return into[:size]
+                    return bytes(data)
             
-            end_time = time.time() + timeout
+            end_time = now() + timeout
             while len(data) < size:
-                remaining = end_time - time.time()
+                remaining = end_time - now()
                 if remaining <= 0:
                     self.stats['timeouts'] += 1
                     return None
                 try:
-                    self._raw_sock.settimeout(min(remaining, 2.0))
-                    # Read extra to account for IAC sequences that expand data
+                    self._set_raw_timeout(min(remaining, 2.0))
+                    # Extra deckt IAC-Sequenzen ab; bei Blockdaten Read-Ahead
+                    # bis zum Ende des erwarteten Windows
                     want = size - len(data)
-                    chunk = self._raw_sock.recv(want + 128)
+                    chunk = self._raw_sock.recv(max(want + 128, min(ahead, RECV_AHEAD)))
                     if not chunk:
                         return None
                     
@@ -375,7 +636,7 @@ class TurboModem:
                                 if i + 1 >= len(chunk):
                                     # 0xFF at end of chunk - need more data
                                     # Save it and read more next iteration
-                                    self._raw_sock.settimeout(2.0)
+                                    self._set_raw_timeout(2.0)
                                     try:
                                         more = self._raw_sock.recv(16)
                                         if more:
@@ -395,7 +656,7 @@ class TurboModem:
                                     # IAC WILL/WONT/DO/DONT + option = 3 bytes
                                     if i + 2 >= len(chunk):
                                         # Need more data for option byte
-                                        self._raw_sock.settimeout(2.0)
+                                        self._set_raw_timeout(2.0)
                                         try:
                                             more = self._raw_sock.recv(16)
                                             if more:
@@ -418,36 +679,39 @@ class TurboModem:
                                 data.extend(chunk[i:j])
                                 i = j
                 except Exception:
-                    if time.time() >= end_time:
+                    if now() >= end_time:
                         self.stats['timeouts'] += 1
                         return None
             
             # If we got more than needed, save excess to drain buffer
             if len(data) > size:
                 self._drain_buf = bytearray(data[size:]) + self._drain_buf
-                return bytes(data[:size])
+                del data[size:]
+            if into is not None:
+                into[:size] = data
+                return into[:size]
             return bytes(data)
         
         # Nur bei großen Requests loggen (Block-Daten)
-        if size > 100:
+        if self.debug and size > 100:
             self.log(f"_recv_exact: Requesting {size} bytes, timeout={timeout}s")
         
         # Nutze unsere Connection get_received_data_raw
-        if hasattr(self.conn, 'get_received_data_raw'):
+        if self._recv_queue is not None:
             # WICHTIG: get_received_data_raw könnte weniger zurückgeben!
             # Wir müssen in Loop sammeln bis wir exakt size Bytes haben
             data = bytearray()
-            end_time = time.time() + timeout
+            end_time = now() + timeout
             loop_count = 0
             
             while len(data) < size:
-                if time.time() > end_time:
+                if now() > end_time:
                     self.log(f"_recv_exact: TIMEOUT! Got {len(data)}/{size} bytes after {loop_count} loops")
                     self.stats['timeouts'] += 1
                     return None
                 
                 remaining = size - len(data)
-                chunk = self.conn.get_received_data_raw(remaining, timeout=max(0.1, end_time - time.time()))
+                chunk = self._recv_queue(remaining, timeout=max(0.1, end_time - now()))
                 loop_count += 1
                 
                 if not chunk:
@@ -456,74 +720,98 @@ class TurboModem:
                     continue
                 
                 # Nur bei Problemen loggen (mehr als 3 loops)
-                if loop_count > 3 and size > 100:
+                if self.debug and loop_count > 3 and size > 100:
                     self.log(f"_recv_exact: Loop {loop_count}: Got {len(chunk)} bytes, total {len(data)+len(chunk)}/{size}")
                 
                 data.extend(chunk)
             
             # Nur bei Problemen loggen (mehr als 2 loops)
-            if loop_count > 2 and size > 100:
+            if self.debug and loop_count > 2 and size > 100:
                 self.log(f"_recv_exact: Took {loop_count} loops to get {len(data)} bytes")
             
+            if into is not None:
+                into[:size] = data
+                return into[:size]
             return bytes(data)
         else:
             # Fallback für direkte Socket
-            data = bytearray()
-            end_time = time.time() + timeout
+            # Empfang direkt an die Zielposition (recv_into), kein extend()
+            if into is not None:
+                view = into[:size]
+            else:
+                data = bytearray(size)
+                view = memoryview(data)
+            got = 0
+            recv_into = getattr(self.conn, 'recv_into', None)
+            end_time = now() + timeout
             
             # WICHTIG: Setze Socket-Timeout!
+            # settimeout() kostet jedes Mal einen Syscall - nur bei Änderung
+            # aufrufen (cur_timeout = bekannter Wert am Socket)
             old_timeout = None
+            cur_timeout = None
             try:
                 if hasattr(self.conn, 'gettimeout'):
                     old_timeout = self.conn.gettimeout()
-                    self.conn.settimeout(timeout)
+                    if old_timeout != timeout:
+                        self.conn.settimeout(timeout)
+                    cur_timeout = timeout
             except:
                 pass
             
+            fresh = cur_timeout is not None
             try:
-                while len(data) < size:
-                    if time.time() > end_time:
-                        return None
-                    
+                while got < size:
                     try:
-                        remaining_time = end_time - time.time()
+                        remaining_time = end_time - now()
                         if remaining_time <= 0:
                             return None
                         
-                        # Update timeout für verbleibende Zeit
-                        if hasattr(self.conn, 'settimeout'):
-                            self.conn.settimeout(max(0.1, remaining_time))
+                        # Update timeout für verbleibende Zeit (erster recv
+                        # läuft noch mit dem gerade gesetzten vollen Timeout)
+                        if fresh:
+                            fresh = False
+                        elif hasattr(self.conn, 'settimeout'):
+                            cur_timeout = max(0.1, remaining_time)
+                            self.conn.settimeout(cur_timeout)
                         
-                        chunk = self.conn.recv(size - len(data))
-                        if not chunk:
+                        if recv_into is not None:
+                            n = recv_into(view[got:], size - got)
+                        else:
+                            chunk = self.conn.recv(size - got)
+                            n = len(chunk)
+                            view[got:got + n] = chunk
+                        if not n:
                             return None
-                        data.extend(chunk)
+                        got += n
                     except Exception as e:
                         # Timeout oder anderer Error
-                        if time.time() > end_time:
+                        if now() > end_time:
                             return None
                         # Kurz warten und retry
                         time.sleep(0.001)
             finally:
                 # Stelle alten Timeout wieder her
-                if old_timeout is not None:
+                if old_timeout is not None and old_timeout != cur_timeout:
                     try:
                         self.conn.settimeout(old_timeout)
                     except:
                         pass
             
+            if into is not None:
+                return view
             return bytes(data)
     
     def _recv_exact_unesc(self, size, timeout=3.0):
         """Receive exactly 'size' bytes with Telnet IAC unescaping.
         0xFF 0xFF → 0xFF, IAC commands consumed."""
-        import time
+        now = time.monotonic
         result = bytearray()
         leftover = bytearray()
-        end_time = time.time() + timeout
+        end_time = now() + timeout
         
         while len(result) < size:
-            remaining = end_time - time.time()
+            remaining = end_time - now()
             if remaining <= 0:
                 self.stats['timeouts'] += 1
                 return None
@@ -576,27 +864,44 @@ class TurboModem:
         Ignoriert führende Bytes die nicht zum Pattern gehören.
         Nützlich wenn der Buffer Telnet IAC Reste enthält.
         """
+        now = time.monotonic
         pattern_len = len(pattern)
-        buffer = bytearray()
-        end_time = time.time() + timeout
-        
-        while time.time() < end_time:
-            # Versuche ein Byte zu lesen
-            byte = self._recv_exact(1, timeout=1)
-            if not byte:
+        dfa = _pattern_dfa(pattern)
+        skipped = 0
+        tail = bytearray()  # Letzte empfangene Bytes, nur für das Timeout-Log
+        end_time = now() + timeout
+        # Anzahl Bytes am Ende die schon einem Pattern-Anfang entsprechen
+        matched = 0
+        
+        while now() < end_time:
+            # Mehrere Bytes nur, wenn sie schon in _drain_buf liegen (kann nicht
+            # timeouten) und nie über das Pattern-Ende hinaus. Sonst 1 Byte:
+            # bei Timeout verwirft _recv_exact Teildaten, Pattern-Bytes mit
+            # > 1s Abstand gingen sonst verloren
+            want = pattern_len - matched
+            if not (self._raw_sock and len(self._drain_buf) >= want):
+                want = 1
+            chunk = self._recv_exact(want, timeout=1)
+            if not chunk:
                 continue
             
-            buffer.append(byte[0])
+            # KMP-Automat: Pattern kann frühestens mit dem letzten Byte komplett sein
+            for b in chunk:
+                matched = dfa[matched][b]
+            skipped += len(chunk)
             
-            # Suche nach Pattern am Ende des Buffers
-            if len(buffer) >= pattern_len:
-                if buffer[-pattern_len:] == bytearray(pattern):
-                    # Pattern gefunden!
-                    if len(buffer) > pattern_len:
-                        self.log(f"_wait_for_pattern: Skipped {len(buffer)-pattern_len} bytes before {pattern}")
-                    return pattern
-        
-        self.log(f"_wait_for_pattern: Timeout after {timeout}s, buffer: {bytes(buffer)}")
+            if matched == pattern_len:
+                # Pattern gefunden!
+                skipped -= pattern_len
+                if skipped:
+                    self.log(f"_wait_for_pattern: Skipped {skipped} bytes before {pattern}")
+                return pattern
+            
+            if self.debug:
+                tail.extend(chunk)
+                del tail[:-64]
+        
+        self.log(f"_wait_for_pattern: Timeout after {timeout}s, {skipped} bytes skipped, last: {bytes(tail)}")
         return None
     
     def send_block(self, block_num, data):
@@ -612,62 +917,53 @@ class TurboModem:
         """
         # Pad data to BLOCK_SIZE if needed
         original_len = len(data)
-        if len(data) < BLOCK_SIZE:
-            data = data + b'\x00' * (BLOCK_SIZE - len(data))
-        
-        # Build header - Size ist IMMER die gepaddete Größe für konsistentes Empfangen
-        header = MAGIC + struct.pack('>I', block_num) + struct.pack('>H', BLOCK_SIZE)
+        data = self._pad_block(data)
         
         # Calculate CRC-32 over padded data
-        crc = zlib.crc32(data) & 0xFFFFFFFF
+        crc = crc32(data)
         
-        # Send complete block
-        block = header + data + struct.pack('>I', crc)
+        # Send complete block - Size ist IMMER die gepaddete Größe für konsistentes Empfangen
+        block = self._frame_block(block_num, data, crc)
         total_size = len(block)
         
-        self.log(f"send_block #{block_num}: {original_len} bytes data, {total_size} bytes total (header+padding+crc)")
-        
-        # Nutze send_raw wenn verfügbar (BBSTelnetClient), sonst sendall (Socket)
-        if hasattr(self.conn, 'send_raw'):
-            self.log(f"send_block #{block_num}: Using send_raw()")
-            result = self.conn.send_raw(block)
-            self.log(f"send_block #{block_num}: send_raw() returned {result}")
-        elif hasattr(self.conn, 'sendall'):
-            self.log(f"send_block #{block_num}: Using sendall()")
-            self._send(block)
-            self.log(f"send_block #{block_num}: sendall() done")
-        else:
-            # Fallback: Versuche direkt zu senden
-            self.log(f"send_block #{block_num}: Using conn.send()")
-            self.conn.send(block)
+        if self.debug:
+            self.log(f"send_block #{block_num}: {original_len} bytes data, {total_size} bytes total (header+padding+crc)")
+        
+        # send_raw (BBSTelnetClient), sendall (Socket) oder send - in __init__ gewählt
+        self._send(block)
         
         self.stats['blocks_sent'] += 1
-        self.log(f"send_block #{block_num}: COMPLETE")
+        if self.debug:
+            self.log(f"send_block #{block_num}: COMPLETE")
     
-    def receive_block(self, timeout=3.0):
+    def receive_block(self, timeout=3.0, into=None, ahead=0):
         """
         Empfängt einen TurboBlock
         
         Format:
         [MAGIC: 2B][Block#: 4B][Size: 2B][Data: N][CRC-32: 4B]
         
+        Args:
+            into: Optionaler memoryview-Puffer für Blockdaten + CRC; data ist
+                  dann ein View darauf und nur bis zum nächsten Aufruf gültig
+            ahead: Noch erwartete Bytes ab Blockdaten (dieser Block + folgende
+                   Frames im Window) - obere Grenze für den Read-Ahead
+        
         Returns:
             (block_num, data) oder None bei Error
         """
         # In direct socket mode, _recv_exact handles IAC internally
         # In queue mode with telnet_unescape, use _recv_exact_unesc
-        if self._raw_sock:
-            recv = self._recv_exact
-        else:
-            recv = self._recv_exact_unesc if self.telnet_unescape else self._recv_exact
+        unesc = not self._raw_sock and self.telnet_unescape
+        recv = self._recv_exact_unesc if unesc else self._recv_exact
         
         # Read header
-        header = recv(8, timeout)
+        header = recv(BLOCK_HEADER.size, timeout)
         if not header:
             self.log("receive_block: Failed to receive header")
             return None
         
-        magic, block_num, block_size = struct.unpack('>2sIH', header)
+        magic, block_num, block_size = BLOCK_HEADER.unpack(header)
         if magic != MAGIC:
             self.log(f"receive_block: Invalid magic: {magic} (expected {MAGIC})")
             return None
@@ -677,23 +973,25 @@ class TurboModem:
         actual_recv_size = block_size if block_size > 0 else BLOCK_SIZE
         
         # Nur alle 10 Blocks loggen (zu viel Output sonst!)
-        if block_num % 10 == 0:
+        if self.debug and block_num % 10 == 0:
             self.log(f"receive_block: Block #{block_num}, header_size={block_size}, recv_size={actual_recv_size}")
         
-        # Read data - empfange die angegebene Größe
-        data = recv(actual_recv_size, timeout)
-        if not data:
-            self.log(f"receive_block: Failed to receive data for block #{block_num}")
-            return None
-        
-        # Read CRC
-        crc_bytes = recv(4, timeout)
-        if not crc_bytes:
-            self.log(f"receive_block: Failed to receive CRC for block #{block_num}")
+        # Read data + CRC mit einem Aufruf - empfange die angegebene Größe
+        # (direkt in den Puffer des Aufrufers, wenn er groß genug ist)
+        payload_size = actual_recv_size + BLOCK_CRC.size
+        if unesc:
+            payload = recv(payload_size, timeout)
+        elif into is not None and payload_size <= len(into):
+            payload = recv(payload_size, timeout, into, ahead)
+        else:
+            payload = recv(payload_size, timeout, None, ahead)
+        if not payload:
+            self.log(f"receive_block: Failed to receive data/CRC for block #{block_num}")
             return None
         
-        expected_crc = struct.unpack('>I', crc_bytes)[0]
-        actual_crc = zlib.crc32(data) & 0xFFFFFFFF
+        data = payload[:actual_recv_size]
+        (expected_crc,) = BLOCK_CRC.unpack_from(payload, actual_recv_size)
+        actual_crc = crc32(data)
         
         if expected_crc != actual_crc:
             self.log(f"receive_block: CRC MISMATCH on block #{block_num}! Expected {expected_crc:08x}, got {actual_crc:08x}")
@@ -724,11 +1022,10 @@ class TurboModem:
         
         self.log(f"===== SEND FILE START: {filepath} =====")
         self.stats['start_time'] = time.time()
+        self._tune_socket_buffers()
         
-        # Datei komplett einlesen (wie Server)
-        with open(filepath, 'rb') as f:
-            filedata = f.read()
-        filesize = len(filedata)
+        # Datei wird während des Sendens windowweise im Hintergrund gelesen
+        filesize = os.path.getsize(filepath)
         
         # Extrahiere Dateinamen MIT Extension
         basename = os.path.basename(filepath)
@@ -766,7 +1063,7 @@ class TurboModem:
         filename_bytes = filename_to_send.encode('utf-8')
         
         # Format: OK(4) + Filesize(8) + FilenameLen(2) + Filename(N)
-        header = CMD_OK + struct.pack('>Q', filesize) + struct.pack('>H', len(filename_bytes)) + filename_bytes
+        header = OK_HEADER.pack(CMD_OK, filesize, len(filename_bytes)) + filename_bytes
         self._send(header)
         self.log(f"Sent TBOK header ({len(header)} bytes)")
         
@@ -780,56 +1077,47 @@ class TurboModem:
         block_num = 1
         offset = 0
         
-        while offset < filesize:
+        for window, crcs in self._prefetch_windows(filepath, filesize, WINDOW_SIZE * BLOCK_SIZE):
             # Send window of blocks
             window_start = block_num
-            blocks_sent = 0
+            window_end = offset + len(window)
             
-            while blocks_sent < WINDOW_SIZE and offset < filesize:
-                chunk = filedata[offset:offset + BLOCK_SIZE]
-                chunk_padded = chunk.ljust(BLOCK_SIZE, b'\x00')
-                chunk_crc = zlib.crc32(chunk_padded) & 0xFFFFFFFF
-                
-                # TB(2) + block#(4) + size(2) + data(4096) + CRC(4)
-                block = MAGIC
-                block += struct.pack('>I', block_num)
-                block += struct.pack('>H', BLOCK_SIZE)
-                block += chunk_padded
-                block += struct.pack('>I', chunk_crc)
-                
-                self._send(block)
-                self.stats['blocks_sent'] += 1
-                
-                offset += len(chunk)
-                block_num += 1
-                blocks_sent += 1
+            # Alle Frames des Windows in einem Puffer bauen und mit einem
+            # einzigen _send() (= ein sendall) verschicken statt einem pro Block.
+            # socket.sendfile() bringt hier nichts: die Daten werden für die
+            # CRC ohnehin gelesen, und Header/CRC zwischen den Blöcken würden
+            # mehrere Syscalls pro Block statt einem pro Window erfordern.
+            window_buf, n_blocks = self._build_window(window, crcs, block_num)
+            self._send(window_buf)
+            block_num += n_blocks
+            self.stats['blocks_sent'] += n_blocks
+            
+            offset = window_end
             
-            pct = min(100, offset * 100 // filesize)
-            self.log(f"Sent blocks {window_start}-{block_num-1}/{total_blocks} ({pct}%)")
+            if self.debug:
+                pct = min(100, offset * 100 // filesize)
+                self.log(f"Sent blocks {window_start}-{block_num-1}/{total_blocks} ({pct}%)")
             
             if callback:
-                callback(offset, filesize, f"Sent {offset // 1024} KB", filename_to_send)
+                callback(offset, filesize, f"Sent {offset >> 10} KB", filename_to_send)
             
             # Wait for ACK (wie in _send_file_after_request)
-            self.log("Waiting for ACK...")
-            ack_cmd = self._recv_exact(4, timeout=30)
+            if self.debug:
+                self.log("Waiting for ACK...")
+            # TBAC + Bitmap und TBCAN sind beide 5 Bytes - ein Read
+            ack = self._recv_exact(5, timeout=30)
             
-            if ack_cmd == CMD_CAN:
+            if ack == CMD_CAN:
                 self.log("Transfer cancelled by receiver")
                 return False
             
-            if ack_cmd != CMD_ACK:
-                self.log(f"Expected ACK, got: {ack_cmd}")
+            if not ack or ack[:4] != CMD_ACK:
+                self.log(f"Expected ACK, got: {ack}")
                 return False
             
-            # Get bitmap
-            bitmap_bytes = self._recv_exact(1, timeout=5)
-            if not bitmap_bytes:
-                self.log("No bitmap received")
-                return False
-            
-            bitmap = bitmap_bytes[0]
-            self.log(f"Got ACK with bitmap {bitmap:02x}")
+            bitmap = ack[4]
+            if self.debug:
+                self.log(f"Got ACK with bitmap {bitmap:02x}")
             
             if bitmap < 0xFE:
                 self.log(f"Retransmit requested (bitmap={bitmap:02x}), but continuing anyway")
@@ -878,10 +1166,11 @@ class TurboModem:
         Receive ACK (wie Server _recv_ack, aber vereinfacht)
         Returns ACK bytes (5 bytes: TBAC + bitmap) oder None
         """
+        now = time.monotonic
         buffer = bytearray()
-        start = time.time()
+        start = now()
         
-        while time.time() - start < timeout:
+        while now() - start < timeout:
             chunk = self._recv_exact(32, timeout=1)
             if chunk:
                 buffer.extend(chunk)
@@ -892,6 +1181,10 @@ class TurboModem:
                 # Found TBAC - need one more byte for bitmap
                 if len(buffer) >= tbac_pos + 5:
                     return bytes(buffer[tbac_pos:tbac_pos + 5])
+            elif len(buffer) >= len(CMD_ACK):
+                # Nur ein möglicher TBAC-Anfang am Ende muss erhalten bleiben,
+                # damit der Buffer nicht wächst und find() nicht alles neu durchsucht
+                del buffer[:1 - len(CMD_ACK)]
         
         return None
     
@@ -954,6 +1247,8 @@ class TurboModem:
             if not self.telnet_unescape:
                 self.telnet_unescape = True
                 self.log("Auto-enabled Telnet unescaping (BBS connection detected)")
+        else:
+            self._tune_socket_buffers()
         
         try:
             return self._receive_file_impl(filepath, callback)
@@ -1099,19 +1394,12 @@ class TurboModem:
         # OK empfangen - jetzt Filesize + Filename empfangen
         self.log("Waiting for Filesize + Filename...")
         
-        # Receive filesize (8 bytes)
-        filesize_bytes = self._recv(8, timeout=10)
-        if not filesize_bytes:
+        # Receive filesize (8 bytes) + filename length (2 bytes)
+        file_info = self._recv(FILE_INFO.size, timeout=10)
+        if not file_info:
             return (False, None)
         
-        filesize = struct.unpack('>Q', filesize_bytes)[0]
-        
-        # Receive filename length (2 bytes)
-        filename_len_bytes = self._recv(2, timeout=10)
-        if not filename_len_bytes:
-            return (False, None)
-        
-        filename_len = struct.unpack('>H', filename_len_bytes)[0]
+        filesize, filename_len = FILE_INFO.unpack(file_info)
         self.log(f"Filename length: {filename_len}")
         
         # Receive filename
@@ -1134,12 +1422,20 @@ class TurboModem:
             callback(0, filesize, "Starting TurboModem receive...", filename)
         
         # KRITISCH: Öffne actual_filepath (NICHT filepath!)
-        with open(actual_filepath, 'wb') as f:
+        # Ungepuffert: Fenster gehen per writev direkt in den Page Cache
+        with open_preallocated(actual_filepath, filesize, buffering=0) as f:
             expected_block = 1
-            window_received = {}  # {block_num: data}
+            # Feste Slots statt Dict: Index = block_num - expected_block,
+            # received_mask hat Bit i gesetzt wenn Slot i belegt ist
+            window_slots = [None] * WINDOW_SIZE
+            received_mask = 0
+            # Empfangspuffer: einer pro Slot plus ein freier für den nächsten Block
+            slot_bufs = [memoryview(bytearray(BLOCK_SIZE + BLOCK_CRC.size)) for _ in range(WINDOW_SIZE)]
+            spare_buf = memoryview(bytearray(BLOCK_SIZE + BLOCK_CRC.size))
             bytes_received = 0
             retries = 0
             window_num = 0
+            receive_block = self.receive_block  # pro Block aufgerufen
             
             while bytes_received < filesize:
                 window_num += 1
@@ -1149,15 +1445,20 @@ class TurboModem:
                 blocks_remaining = (bytes_remaining + BLOCK_SIZE - 1) // BLOCK_SIZE
                 expected_blocks_in_window = min(WINDOW_SIZE, blocks_remaining)
                 
-                self.log(f"===== WINDOW #{window_num} (expecting blocks {expected_block}-{expected_block+expected_blocks_in_window-1}, total={expected_blocks_in_window}) =====")
-                self.log(f"Bytes remaining: {bytes_remaining:,}, blocks remaining: {blocks_remaining}")
+                if self.debug:
+                    self.log(f"===== WINDOW #{window_num} (expecting blocks {expected_block}-{expected_block+expected_blocks_in_window-1}, total={expected_blocks_in_window}) =====")
+                    self.log(f"Bytes remaining: {bytes_remaining:,}, blocks remaining: {blocks_remaining}")
                 
                 # Receive blocks
+                window_mask = FULL_MASKS[expected_blocks_in_window]
+                ack_sent = False
                 blocks_in_window = 0
                 timeout_count = 0
                 
                 while blocks_in_window < expected_blocks_in_window and timeout_count < 3:
-                    block_result = self.receive_block(timeout=10)
+                    # Read-Ahead nur bis zum Ende dieses Windows
+                    ahead = (expected_blocks_in_window - blocks_in_window) * FRAME_SIZE - BLOCK_HEADER.size
+                    block_result = receive_block(timeout=10, into=spare_buf, ahead=ahead)
                     
                     if block_result is None:
                         # Timeout or error
@@ -1180,32 +1481,39 @@ class TurboModem:
                     timeout_count = 0
                     
                     block_num, data = block_result
-                    window_received[block_num] = data
+                    slot = block_num - expected_block
+                    if 0 <= slot < expected_blocks_in_window:
+                        window_slots[slot] = data
+                        received_mask |= 1 << slot
+                        # data liegt im freien Puffer - der bisherige Slot-Puffer wird frei
+                        slot_bufs[slot], spare_buf = spare_buf, slot_bufs[slot]
                     blocks_in_window += 1
                     
                     # Check if we got all EXPECTED blocks (nicht alle WINDOW_SIZE!)
-                    all_received = True
-                    for i in range(expected_blocks_in_window):  # Nur erwartete Blöcke!
-                        if (expected_block + i) not in window_received:
-                            all_received = False
-                            break
+                    all_received = (received_mask & window_mask) == window_mask
                     
                     if all_received:
-                        self.log(f"All {expected_blocks_in_window} expected blocks received!")
+                        # Sofort bestätigen: der Sender schickt das nächste Fenster,
+                        # während wir noch Bitmap bauen und auf Platte schreiben
+                        self._send(CMD_ACK + b'\xfe')
+                        ack_sent = True
+                        if self.debug:
+                            self.log(f"All {expected_blocks_in_window} expected blocks received!")
                         break
                 
                 # Build ACK bitmap - nur für erwartete Blöcke!
-                bitmap = 0xFF  # Start with all bits set
-                for i in range(expected_blocks_in_window):
-                    if (expected_block + i) not in window_received:
-                        bitmap &= ~(1 << i)
+                # Bits jenseits der erwarteten Blöcke bleiben gesetzt
+                bitmap = 0xFF & ~(window_mask & ~received_mask)
                 
-                self.log(f"Window complete: Got {blocks_in_window}/{expected_blocks_in_window} blocks, bitmap={bitmap:02x}")
+                if self.debug:
+                    self.log(f"Window complete: Got {blocks_in_window}/{expected_blocks_in_window} blocks, bitmap={bitmap:02x}")
                 
                 # Send ACK with bitmap (use 0xFE if 0xFF to avoid Telnet IAC)
                 send_bitmap = 0xFE if bitmap == 0xFF else bitmap
-                self._send(CMD_ACK + bytes([send_bitmap]))
-                self.log(f"Sent ACK with bitmap {send_bitmap:02x}")
+                if not ack_sent:
+                    self._send(CMD_ACK + bytes([send_bitmap]))
+                if self.debug:
+                    self.log(f"Sent ACK with bitmap {send_bitmap:02x}")
                 
                 if bitmap < 0xFE:  # Some blocks missing
                     # Some blocks missing - aber prüfe ob wir schon genug Bytes haben
@@ -1228,33 +1536,41 @@ class TurboModem:
                         return (False, None)
                     continue
                 
-                # Write blocks in order
-                blocks_written = 0
-                while expected_block in window_received:
-                    data = window_received[expected_block]
-                    original_len = len(data)
-                    
-                    # Remove padding - trim to exact filesize
-                    if bytes_received + len(data) > filesize:
-                        trim_to = filesize - bytes_received
-                        self.log(f"Block {expected_block}: Trimming from {len(data)} to {trim_to} bytes (would exceed filesize)")
-                        data = data[:trim_to]
-                    
-                    f.write(data)
-                    bytes_received += len(data)
-                    del window_received[expected_block]
-                    expected_block += 1
-                    blocks_written += 1
-                    
-                    if callback and (blocks_written % 8 == 0 or bytes_received >= filesize):
-                        callback(bytes_received, filesize, f"Received {bytes_received // 1024} KB", filename)
-                    
-                    # Check if we're done
-                    if bytes_received >= filesize:
-                        self.log(f"Block {expected_block-1}: Reached filesize ({bytes_received} >= {filesize}), stopping")
-                        break
+                # Write blocks in order - ganzes Fenster mit einem writev
+                # Zusammenhängend belegte Slots ab 0 = Anzahl der unteren 1-Bits
+                blocks_written = ((received_mask + 1) & ~received_mask).bit_length() - 1
+                bufs = window_slots[:blocks_written]
+                window_bytes = sum(map(len, bufs))
                 
-                self.log(f"Wrote {blocks_written} blocks, total bytes={bytes_received:,}/{filesize:,} ({100*bytes_received//filesize}%)")
+                remaining = filesize - bytes_received
+                if window_bytes >= remaining:
+                    # Remove padding - trim to exact filesize, Rest verwerfen
+                    last = 0
+                    while len(bufs[last]) < remaining:
+                        remaining -= len(bufs[last])
+                        last += 1
+                    if len(bufs[last]) > remaining:
+                        self.log(f"Block {expected_block + last}: Trimming from {len(bufs[last])} to {remaining} bytes (would exceed filesize)")
+                        bufs[last] = memoryview(bufs[last])[:remaining]
+                    del bufs[last + 1:]
+                    blocks_written = last + 1
+                    window_bytes = filesize - bytes_received
+                    self.log(f"Block {expected_block + last}: Reached filesize ({filesize}), stopping")
+                
+                if bufs:
+                    _write_blocks(f, bufs)
+                    bytes_received += window_bytes
+                    expected_block += blocks_written
+                    if callback:
+                        callback(bytes_received, filesize, f"Received {bytes_received >> 10} KB", filename)
+                
+                # Fenster weiterschieben (noch nicht geschriebene Slots rutschen nach vorne)
+                received_mask >>= blocks_written
+                window_slots = window_slots[blocks_written:] + [None] * blocks_written
+                slot_bufs = slot_bufs[blocks_written:] + slot_bufs[:blocks_written]
+                
+                if self.debug:
+                    self.log(f"Wrote {blocks_written} blocks, total bytes={bytes_received:,}/{filesize:,} ({100*bytes_received//filesize}%)")
                 
                 # Exit loop if transfer complete  
                 if bytes_received >= filesize:
@@ -1262,25 +1578,25 @@ class TurboModem:
                     break
                 
                 retries = 0
-        
-        # Loop beendet - sende finalen Progress Update SOFORT!
-        self.log(f"Main loop exited. bytes_received={bytes_received}, filesize={filesize}")
-        
-        # WICHTIG: Prüfe und korrigiere die tatsächliche Dateigröße
-        try:
-            actual_size = os.path.getsize(actual_filepath)
-            self.log(f"Actual file size on disk: {actual_size}, expected: {filesize}")
             
-            if actual_size > filesize:
-                self.log(f"WARNING: File on disk ({actual_size}) larger than expected ({filesize}), truncating...")
-                with open(actual_filepath, 'r+b') as f:
+            # Loop beendet - sende finalen Progress Update SOFORT!
+            self.log(f"Main loop exited. bytes_received={bytes_received}, filesize={filesize}")
+            
+            # WICHTIG: Prüfe und korrigiere die tatsächliche Dateigröße
+            # (über das noch offene Handle, kein zweites open)
+            try:
+                actual_size = f.tell()
+                self.log(f"Actual file size on disk: {actual_size}, expected: {filesize}")
+                
+                if actual_size > filesize:
+                    self.log(f"WARNING: File on disk ({actual_size}) larger than expected ({filesize}), truncating...")
                     f.truncate(filesize)
-                self.log(f"Truncated file to {filesize} bytes")
-                bytes_received = filesize
-            elif actual_size < filesize:
-                self.log(f"WARNING: File on disk ({actual_size}) smaller than expected ({filesize})")
-        except Exception as e:
-            self.log(f"ERROR checking/truncating file: {e}")
+                    self.log(f"Truncated file to {filesize} bytes")
+                    bytes_received = filesize
+                elif actual_size < filesize:
+                    self.log(f"WARNING: File on disk ({actual_size}) smaller than expected ({filesize})")
+            except Exception as e:
+                self.log(f"ERROR checking/truncating file: {e}")
         
         if callback:
             callback(bytes_received, filesize, "Finishing transfer...", filename)
@@ -1386,6 +1702,8 @@ class TurboModem:
                 # Enable telnet_unescape for BBS mode
                 self.telnet_unescape = True
                 print(f"### Upload: Direct socket active, telnet_escape=True ###")
+        if not fast_mode:
+            self._tune_socket_buffers()
         
         try:
             # Buffer leeren
@@ -1456,8 +1774,6 @@ class TurboModem:
     
     def _send_file_after_request(self, filepath, filesize, filename, callback=None):
         """Interne Methode: Sendet TBOK + Daten STREAMING (nach TBRQ bereits empfangen)"""
-        import os
-        
         try:
             self.log(f"=== _send_file_after_request START (STREAMING) ===")
             self.log(f"  filepath: {filepath}")
@@ -1470,7 +1786,7 @@ class TurboModem:
             filename_len = len(filename_bytes)
             
             # Format: TBOK(4) + Filesize(8) + FilenameLen(2) + Filename(N)
-            header = CMD_OK + struct.pack('>Q', filesize) + struct.pack('>H', filename_len) + filename_bytes
+            header = OK_HEADER.pack(CMD_OK, filesize, filename_len) + filename_bytes
             self.log(f"Header built: {len(header)} bytes")
             
             # === TBOK RETRY LOOP ===
@@ -1484,8 +1800,17 @@ class TurboModem:
             # WaitSelect catches up).
             tbok_sent = 0
             tbok_max_retries = 60
+            pending_header = None
             
             for tbok_attempt in range(tbok_max_retries):
+                if not self._raw_sock:
+                    # No raw socket - no retry handshake either, so the header
+                    # goes out together with the first window in one send
+                    pending_header = header
+                    tbok_sent += 1
+                    print(f"### Upload: {filename} ({filesize:,} bytes) ###")
+                    break
+                
                 self._send_with_escape(header)
                 tbok_sent += 1
                 self.log(f"TBOK header sent (attempt {tbok_sent}, {len(header)} bytes)")
@@ -1495,35 +1820,31 @@ class TurboModem:
                 # Wait briefly to see if XPR sends another TBRQ (meaning it didn't see our TBOK)
                 # or if it starts expecting blocks (meaning TBOK was received)
                 import select
-                if self._raw_sock:
-                    try:
-                        ready, _, _ = select.select([self._raw_sock], [], [], 0.5)
-                        if ready:
-                            # Something came back - peek to see if it's another TBRQ
-                            import socket as sock_mod
-                            peek = self._raw_sock.recv(4, sock_mod.MSG_PEEK)
-                            if peek == CMD_REQUEST:
-                                # XPR sent another TBRQ - it didn't see our TBOK
-                                # Consume the TBRQ and retry
-                                self._raw_sock.recv(4)
-                                self.log(f"Got repeated TBRQ (attempt {tbok_sent}) - XPR didn't see TBOK, resending...")
-                                print(f"### TBOK retry {tbok_sent} (XPR didn't see it yet) ###")
-                                continue
-                            else:
-                                # Got something else - XPR must have received TBOK
-                                # and is now sending something else (or it's noise)
-                                self.log(f"Got non-TBRQ response after TBOK: {peek.hex()} - proceeding")
-                                break
+                try:
+                    ready, _, _ = select.select([self._raw_sock], [], [], 0.5)
+                    if ready:
+                        # Something came back - peek to see if it's another TBRQ
+                        import socket as sock_mod
+                        peek = self._raw_sock.recv(4, sock_mod.MSG_PEEK)
+                        if peek == CMD_REQUEST:
+                            # XPR sent another TBRQ - it didn't see our TBOK
+                            # Consume the TBRQ and retry
+                            self._raw_sock.recv(4)
+                            self.log(f"Got repeated TBRQ (attempt {tbok_sent}) - XPR didn't see TBOK, resending...")
+                            print(f"### TBOK retry {tbok_sent} (XPR didn't see it yet) ###")
+                            continue
                         else:
-                            # No response within 0.5s - XPR probably received TBOK
-                            # and is now waiting for blocks
-                            self.log(f"No TBRQ retry within 0.5s - TBOK accepted (attempt {tbok_sent})")
+                            # Got something else - XPR must have received TBOK
+                            # and is now sending something else (or it's noise)
+                            self.log(f"Got non-TBRQ response after TBOK: {peek.hex()} - proceeding")
                             break
-                    except Exception as e:
-                        self.log(f"TBOK retry check error: {e}")
+                    else:
+                        # No response within 0.5s - XPR probably received TBOK
+                        # and is now waiting for blocks
+                        self.log(f"No TBRQ retry within 0.5s - TBOK accepted (attempt {tbok_sent})")
                         break
-                else:
-                    # No raw socket - just send once and hope for the best
+                except Exception as e:
+                    self.log(f"TBOK retry check error: {e}")
                     break
             
             self.log(f"TBOK handshake complete after {tbok_sent} attempts")
@@ -1535,40 +1856,31 @@ class TurboModem:
                 except Exception as cb_err:
                     self.log(f"WARNING: Callback error: {cb_err}")
             
-            f = open(filepath, 'rb')
-            
             block_num = 0
             bytes_sent = 0
             total_blocks = (filesize + BLOCK_SIZE - 1) // BLOCK_SIZE
             if total_blocks == 0:
                 total_blocks = 1
             
-            while True:
-                data = f.read(BLOCK_SIZE)
-                if not data:
-                    break
-                
-                block_num += 1
-                original_len = len(data)
-                
-                # Pad to BLOCK_SIZE
-                if len(data) < BLOCK_SIZE:
-                    data = data + b'\x00' * (BLOCK_SIZE - len(data))
-                
-                # Build block: MAGIC(2) + BlockNum(4) + Size(2) + Data(4096) + CRC(4)
-                block_header = MAGIC + struct.pack('>I', block_num) + struct.pack('>H', BLOCK_SIZE)
-                crc = zlib.crc32(data) & 0xFFFFFFFF
-                block = block_header + data + struct.pack('>I', crc)
-                
-                self._send_with_escape(block)
+            # Der Reader-Thread liest das nächste Window (inkl. CRCs) schon,
+            # während das aktuelle gesendet bzw. auf Flow-Control gewartet wird
+            for window, crcs in self._prefetch_windows(filepath, filesize, WINDOW_SIZE * BLOCK_SIZE):
+                # Alle Blöcke des Windows (MAGIC + BlockNum + Size + Data + CRC)
+                # in einen Puffer framen und mit einem Send verschicken
+                window_buf, n_blocks = self._build_window(window, crcs, block_num + 1)
+                if pending_header is not None:
+                    window_buf = pending_header + window_buf
+                    pending_header = None
+                self._send_with_escape(window_buf)
                 
-                bytes_sent += original_len
-                self.stats['blocks_sent'] += 1
+                block_num += n_blocks
+                bytes_sent += len(window)
+                self.stats['blocks_sent'] += n_blocks
                 
-                # Callback every 8 blocks
+                # Callback once per window (every 8 blocks)
                 if callback and (block_num % 8 == 0 or bytes_sent >= filesize):
                     try:
-                        callback(bytes_sent, filesize, f"Sent {bytes_sent // 1024} KB", filename)
+                        callback(bytes_sent, filesize, f"Sent {bytes_sent >> 10} KB", filename)
                     except:
                         pass
                 
@@ -1582,10 +1894,12 @@ class TurboModem:
                 # Flow control: wait for ACK every 256 blocks (1MB)
                 # The XPR library sends TBAC+0xFF after every 256 blocks received
                 if block_num % 256 == 0:
-                    self.log(f"Waiting for flow control ACK after block {block_num}...")
+                    if self.debug:
+                        self.log(f"Waiting for flow control ACK after block {block_num}...")
                     ack = self._recv(5, timeout=30)
                     if ack and len(ack) >= 4 and ack[:4] == CMD_ACK:
-                        self.log(f"Flow control ACK received")
+                        if self.debug:
+                            self.log(f"Flow control ACK received")
                     elif ack and len(ack) >= 5 and ack[:5] == CMD_CAN:
                         self.log(f"CANCEL received from library")
                         raise Exception("Transfer cancelled by receiver")
@@ -1593,11 +1907,12 @@ class TurboModem:
                         self.log(f"Unexpected flow control response: {ack}")
                         # Continue anyway - might be Telnet noise
             
-            f.close()
-            
-            # Send EOT
+            # Send EOT (leere Datei: Header steht noch aus)
             self.log("Sending EOT...")
-            self._send_with_escape(CMD_EOT)
+            if pending_header is not None:
+                self._send_with_escape(pending_header + CMD_EOT)
+            else:
+                self._send_with_escape(CMD_EOT)
             
             # Wait for final ACK (5 bytes: TBAC + bitmap)
             final_ack = self._recv(5, timeout=10)
@@ -1663,6 +1978,8 @@ class TurboModem:
             if not self.telnet_unescape:
                 self.telnet_unescape = True
                 self.log("Auto-enabled Telnet unescaping (BBS connection detected)")
+        else:
+            self._tune_socket_buffers()
         
         try:
             return self._receive_files_impl(target_dir, callback, max_files)
@@ -1738,17 +2055,11 @@ class TurboModem:
         """Interne Methode: Empfängt Dateidaten nach TBOK - STREAMING MODE"""
         import os
         
-        # Receive filesize
-        filesize_bytes = self._recv(8, timeout=10)
-        if not filesize_bytes:
-            return (False, None)
-        filesize = struct.unpack('>Q', filesize_bytes)[0]
-        
-        # Receive filename length
-        filename_len_bytes = self._recv(2, timeout=10)
-        if not filename_len_bytes:
+        # Receive filesize + filename length
+        file_info = self._recv(FILE_INFO.size, timeout=10)
+        if not file_info:
             return (False, None)
-        filename_len = struct.unpack('>H', filename_len_bytes)[0]
+        filesize, filename_len = FILE_INFO.unpack(file_info)
         
         # Receive filename
         filename_bytes = self._recv(filename_len, timeout=10)
@@ -1773,9 +2084,15 @@ class TurboModem:
         
         self.log(f"STREAMING receive: {total_blocks} blocks of {BLOCK_SIZE} bytes")
         
-        with open(filepath, 'wb') as f:
+        # Ein Puffer für alle Blöcke - jeder Block wird vor dem nächsten geschrieben
+        block_buf = memoryview(bytearray(BLOCK_SIZE + BLOCK_CRC.size))
+        receive_block = self.receive_block  # pro Block aufgerufen
+        
+        with open_preallocated(filepath, filesize) as f:
             while bytes_received < filesize:
-                result = self.receive_block(timeout=30)
+                # Read-Ahead nur bis zum letzten Block der Datei
+                ahead = (total_blocks - blocks_written) * FRAME_SIZE - BLOCK_HEADER.size
+                result = receive_block(timeout=30, into=block_buf, ahead=ahead)
                 if not result:
                     self.log(f"Block receive failed at block {blocks_written + 1}")
                     print(f"### Block receive FAILED at block {blocks_written + 1}, {bytes_received}/{filesize} ###")
@@ -1784,7 +2101,7 @@ class TurboModem:
                     while retries < 3 and not result:
                         retries += 1
                         self.log(f"Retry {retries}/3...")
-                        result = self.receive_block(timeout=30)
+                        result = receive_block(timeout=30, into=block_buf, ahead=ahead)
                     if not result:
                         self._send(CMD_CAN)
                         return (False, None)
@@ -1800,9 +2117,9 @@ class TurboModem:
                 bytes_received += len(data)
                 blocks_written += 1
                 
-                # Progress callback every 8 blocks
-                if callback and (blocks_written % 8 == 0 or bytes_received >= filesize):
-                    callback(bytes_received, filesize, f"Received {bytes_received // 1024} KB", filename)
+                # Progress callback once per window's worth of blocks
+                if callback and (blocks_written % WINDOW_SIZE == 0 or bytes_received >= filesize):
+                    callback(bytes_received, filesize, f"Received {bytes_received >> 10} KB", filename)
                 
                 # Console progress every 256 blocks (~1MB)
                 if blocks_written % 256 == 0 or bytes_received >= filesize:
@@ -1835,29 +2152,40 @@ class TurboModem:
 # LOCAL TEST (Python to Python over socket pair)
 # =============================================================================
 
-def run_local_test():
+def run_local_test(verbose=True, keep_files=False):
     """
     Test Multi-File Transfer lokal (ohne C64)
     
     Erstellt Test-Dateien, sendet sie über Socket-Pair
+    
+    Args:
+        verbose: Fortschritt (Setup, Start) ausgeben - der Ergebnis-Report
+                 kommt immer
+        keep_files: Test-Verzeichnis nach dem Lauf behalten (sonst gelöscht)
     """
     import socket
+    import sys
     import threading
     import tempfile
     import os
+    import shutil
     
-    print("=" * 60)
-    print("TURBOMODEM LOCAL MULTI-FILE TEST")
-    print("=" * 60)
+    if verbose:
+        print("=" * 60)
+        print("TURBOMODEM LOCAL MULTI-FILE TEST")
+        print("=" * 60)
     
-    # Create test directory
-    test_dir = tempfile.mkdtemp(prefix="turbomodem_test_")
+    # Create test directory - auf tmpfs (/dev/shm) wenn vorhanden, dann
+    # laufen Erstellen/Verifizieren ohne Block-Layer
+    shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    test_dir = tempfile.mkdtemp(prefix="turbomodem_test_", dir=shm_dir)
     send_dir = os.path.join(test_dir, "send")
     recv_dir = os.path.join(test_dir, "recv")
     os.makedirs(send_dir)
     os.makedirs(recv_dir)
     
-    print(f"Test directory: {test_dir}")
+    if verbose:
+        print(f"Test directory: {test_dir}")
     
     # Create test files
     test_files = []
@@ -1867,22 +2195,23 @@ def run_local_test():
         ("test3.dat", 32768),     # 32 KB
     ]):
         filepath = os.path.join(send_dir, name)
-        with open(filepath, 'wb') as f:
-            pattern = bytes([i] * 256)
-            for _ in range(size // 256):
-                f.write(pattern)
-            f.write(pattern[:size % 256])
+        with open(filepath, 'wb', buffering=0) as f:
+            f.write(bytes([i]) * size)
         test_files.append(filepath)
-        print(f"Created: {name} ({size} bytes)")
+        if verbose:
+            print(f"Created: {name} ({size} bytes)")
     
     # Create socket pair
     server_sock, client_sock = socket.socketpair()
     
     results = {'sender': None, 'receiver': None}
+    # Sender startet erst, wenn der Receiver aufgesetzt ist
+    receiver_ready = threading.Event()
     
     def sender_thread():
         try:
             turbo = TurboModem(server_sock, debug=False)
+            receiver_ready.wait(timeout=5)
             success, count = turbo.send_files(test_files)
             results['sender'] = (success, count)
         except Exception as e:
@@ -1894,6 +2223,7 @@ def run_local_test():
     def receiver_thread():
         try:
             turbo = TurboModem(client_sock, debug=False)
+            receiver_ready.set()
             success, files = turbo.receive_files(recv_dir)
             results['receiver'] = (success, files)
         except Exception as e:
@@ -1902,8 +2232,9 @@ def run_local_test():
             traceback.print_exc()
             results['receiver'] = (False, [])
     
-    print("\nStarting transfer...")
-    print("-" * 40)
+    if verbose:
+        print("\nStarting transfer...")
+        print("-" * 40)
     
     sender = threading.Thread(target=sender_thread)
     receiver = threading.Thread(target=receiver_thread)
@@ -1914,47 +2245,80 @@ def run_local_test():
     sender.join(timeout=60)
     receiver.join(timeout=60)
     
-    print("\n" + "=" * 60)
-    print("RESULTS")
-    print("=" * 60)
+    if sender.is_alive() or receiver.is_alive():
+        # Hängender Transfer: Sockets dicht machen, damit die Threads
+        # aus recv()/send() aussteigen, bevor irgendwas aufgeräumt wird
+        for sock in (server_sock, client_sock):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        sender.join(timeout=10)
+        receiver.join(timeout=10)
+    workers_done = not (sender.is_alive() or receiver.is_alive())
+    
+    # Report sammeln und am Ende mit einem write() ausgeben
+    report = []
+    report.append("\n" + "=" * 60)
+    report.append("RESULTS")
+    report.append("=" * 60)
     
     if results['sender']:
         success, count = results['sender']
-        print(f"Sender: {'OK' if success else 'FAIL'} - {count} files sent")
+        report.append(f"Sender: {'OK' if success else 'FAIL'} - {count} files sent")
     
     if results['receiver']:
         success, files = results['receiver']
-        print(f"Receiver: {'OK' if success else 'FAIL'} - {len(files)} files received")
+        report.append(f"Receiver: {'OK' if success else 'FAIL'} - {len(files)} files received")
         
-        print("\nVerifying files:")
-        all_ok = True
-        for filepath in files:
+        def verify_one(filepath):
             filename = os.path.basename(filepath)
             original = os.path.join(send_dir, filename)
             
-            if os.path.exists(original) and os.path.exists(filepath):
-                with open(original, 'rb') as f1, open(filepath, 'rb') as f2:
-                    orig_data = f1.read()
-                    recv_data = f2.read()
-                
-                if orig_data == recv_data:
-                    print(f"  ✓ {filename}: OK ({len(recv_data)} bytes)")
-                else:
-                    print(f"  ✗ {filename}: MISMATCH!")
-                    all_ok = False
+            if not (os.path.exists(original) and os.path.exists(filepath)):
+                return filename, None, 0
+            # Blockweise vergleichen statt beide Dateien komplett zu laden
+            size = 0
+            with open(original, 'rb') as f1, open(filepath, 'rb') as f2:
+                while True:
+                    chunk = f1.read(65536)
+                    if chunk != f2.read(65536):
+                        return filename, False, size
+                    if not chunk:
+                        return filename, True, size
+                    size += len(chunk)
+        
+        report.append("\nVerifying files:")
+        all_ok = True
+        for filename, ok, size in map(verify_one, files):
+            if ok is None:
+                report.append(f"  ✗ {filename}: File missing!")
+                all_ok = False
+            elif ok:
+                report.append(f"  ✓ {filename}: OK ({size} bytes)")
             else:
-                print(f"  ✗ {filename}: File missing!")
+                report.append(f"  ✗ {filename}: MISMATCH!")
                 all_ok = False
         
         if all_ok:
-            print("\n✓ ALL FILES VERIFIED OK!")
+            report.append("\n✓ ALL FILES VERIFIED OK!")
         else:
-            print("\n✗ VERIFICATION FAILED!")
+            report.append("\n✗ VERIFICATION FAILED!")
     
     server_sock.close()
     client_sock.close()
     
-    print(f"\nTest files in: {test_dir}")
+    # Nur löschen, wenn beide Threads sicher beendet sind - sonst arbeitet
+    # send_files/receive_files evtl. noch im Verzeichnis
+    remove_dir = workers_done and not keep_files
+    if not workers_done:
+        report.append("\n⚠ Transfer threads still running - test files kept")
+    if not remove_dir:
+        report.append(f"\nTest files in: {test_dir}")
+    sys.stdout.write("\n".join(report) + "\n")
+    
+    if remove_dir:
+        shutil.rmtree(test_dir, ignore_errors=True)
     return results
 
 
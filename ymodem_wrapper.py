@@ -4,8 +4,11 @@ Provides simple ymodem_send/receive functions for udarea.py
 """
 
 import os
+import socket
+import stat
 import sys
 import time
+import traceback
 
 # Import file_transfer module
 try:
@@ -15,8 +18,77 @@ except ImportError:
     YMODEM_AVAILABLE = False
     print("[Warning] file_transfer.py not found - YModem disabled")
 
+# Leading bytes of each upload file to pull into the page cache up front
+PREFETCH_BYTES = 4 * 1024 * 1024
 
-def ymodem_send(conn, filepath, callback=None):
+
+def _transfer_socket(conn):
+    """Return the socket underneath conn (plain socket or BBSTelnetClient), or None"""
+    if isinstance(conn, socket.socket):
+        return conn
+    sock = getattr(conn, 'socket', None)
+    if isinstance(sock, socket.socket):
+        return sock
+    return None
+
+
+def _probe_upload_file(path):
+    """Validate an upload file, get its size and start readahead.
+    
+    Returns the file size, or None if path is missing or not a regular
+    file. Only regular files are opened (a FIFO would block waiting for a
+    writer). POSIX_FADV_WILLNEED kicks off asynchronous readahead, so the
+    first blocks are in the page cache by the time the receiver sends 'C'
+    (skipped where posix_fadvise is unavailable).
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NONBLOCK', 0))
+        except OSError:
+            return st.st_size
+        try:
+            os.posix_fadvise(fd, 0, PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    return st.st_size
+
+
+def _tune_transfer_socket(conn, buffer_size=None):
+    """Disable Nagle on the transfer socket and optionally grow its buffers.
+    
+    X/YModem is stop-and-wait: every block waits for a 1-byte ACK/NAK, so
+    Nagle's delayed small segments stall each round trip.
+    
+    buffer_size: SO_SNDBUF/SO_RCVBUF minimum in bytes (None = leave as is).
+    Buffers are only grown, never shrunk. The kernel caps the value at
+    net.core.wmem_max / rmem_max on Linux.
+    """
+    sock = _transfer_socket(conn)
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (AttributeError, OSError):
+        pass  # Not a TCP socket (e.g. socketpair)
+    if buffer_size:
+        for opt in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+            try:
+                if sock.getsockopt(socket.SOL_SOCKET, opt) < buffer_size:
+                    sock.setsockopt(socket.SOL_SOCKET, opt, buffer_size)
+            except (AttributeError, OSError):
+                pass
+
+
+def ymodem_send(conn, filepath, callback=None, socket_buffer_size=None,
+                verbose=True):
     """
     Send file(s) using YModem protocol
     
@@ -28,6 +100,9 @@ def ymodem_send(conn, filepath, callback=None):
         conn: Connection object (socket or BBSTelnetClient)
         filepath: Path to file OR list of file paths
         callback: Optional progress callback(done, total, status, filename)
+        socket_buffer_size: Optional minimum SO_SNDBUF/SO_RCVBUF in bytes,
+                            e.g. bandwidth x RTT for long-haul links
+        verbose: Print status lines (errors are always printed)
     
     Returns:
         tuple: (success: bool, cps: float) - Characters per second
@@ -42,11 +117,14 @@ def ymodem_send(conn, filepath, callback=None):
     else:
         filepaths = list(filepath)
     
-    # Check all files exist
+    # Check all files exist (one stat per file, sizes reused for CPS)
+    total_bytes = 0
     for path in filepaths:
-        if not os.path.isfile(path):
+        size = _probe_upload_file(path)
+        if size is None:
             print(f"[Error] File not found: {path}")
             return (False, 0)
+        total_bytes += size
     
     try:
         # Smart Protocol Selection
@@ -54,15 +132,18 @@ def ymodem_send(conn, filepath, callback=None):
         
         if num_files == 1:
             # Single file → XModem-1K (no header)
-            print(f"[YModem] Single file upload → Using XModem-1K")
+            if verbose:
+                print(f"[YModem] Single file upload → Using XModem-1K")
             protocol = TransferProtocol.XMODEM_1K
             send_path = filepaths[0]
         else:
             # Multiple files → YModem Batch (with headers)
-            print(f"[YModem] Batch upload → {num_files} files with headers")
+            if verbose:
+                print(f"[YModem] Batch upload → {num_files} files with headers")
             protocol = TransferProtocol.YMODEM
             send_path = filepaths  # List
         
+        _tune_transfer_socket(conn, socket_buffer_size)
         transfer = FileTransfer(conn, protocol)
         
         start_time = time.time()
@@ -71,11 +152,11 @@ def ymodem_send(conn, filepath, callback=None):
         
         if success:
             # Calculate CPS
-            total_bytes = sum(os.path.getsize(f) for f in filepaths)
             cps = total_bytes / duration if duration > 0 else 0
             
-            print(f"[YModem] Send successful")
-            print(f"[YModem] Speed: {cps:.0f} CPS ({total_bytes} bytes in {duration:.1f}s)")
+            if verbose:
+                print(f"[YModem] Send successful")
+                print(f"[YModem] Speed: {cps:.0f} CPS ({total_bytes} bytes in {duration:.1f}s)")
             return (True, cps)
         else:
             print("[YModem] Send failed")
@@ -83,12 +164,12 @@ def ymodem_send(conn, filepath, callback=None):
             
     except Exception as e:
         print(f"[YModem] Exception during send: {e}")
-        import traceback
         traceback.print_exc()
         return (False, 0)
 
 
-def ymodem_receive(conn, target_dir, callback=None):
+def ymodem_receive(conn, target_dir, callback=None, socket_buffer_size=None,
+                   verbose=True):
     """
     Receive file(s) using YModem protocol
     
@@ -100,6 +181,8 @@ def ymodem_receive(conn, target_dir, callback=None):
         conn: Connection object
         target_dir: Directory to save received files
         callback: Optional progress callback(done, total, status, filename)
+        socket_buffer_size: Optional minimum SO_SNDBUF/SO_RCVBUF in bytes
+        verbose: Print status lines (errors are always printed)
     
     Returns:
         tuple: (success: bool, filepath_or_list: str/list, cps: float)
@@ -119,9 +202,11 @@ def ymodem_receive(conn, target_dir, callback=None):
             return (False, None, 0)
     
     try:
-        print(f"[YModem] Receiving to: {target_dir}")
+        if verbose:
+            print(f"[YModem] Receiving to: {target_dir}")
         
         # Always use YMODEM protocol - it auto-detects XModem-1K
+        _tune_transfer_socket(conn, socket_buffer_size)
         transfer = FileTransfer(conn, TransferProtocol.YMODEM)
         
         start_time = time.time()
@@ -137,7 +222,8 @@ def ymodem_receive(conn, target_dir, callback=None):
             # We'd need to track actual bytes received
             cps = 0  # Will be calculated from callback or file size
             
-            print(f"[YModem] Receive successful")
+            if verbose:
+                print(f"[YModem] Receive successful")
             return (True, target_dir, cps)
         else:
             print("[YModem] Receive failed")
@@ -145,7 +231,6 @@ def ymodem_receive(conn, target_dir, callback=None):
             
     except Exception as e:
         print(f"[YModem] Exception during receive: {e}")
-        import traceback
         traceback.print_exc()
         return (False, None, 0)
 